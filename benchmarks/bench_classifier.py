@@ -0,0 +1,81 @@
+"""
+Throughput of the compiled channel classifier against the old regex path.
+
+    python benchmarks/bench_classifier.py [file_count] [--case-insensitive]
+
+Runs without Cinema 4D.
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from textomato import channels
+
+CHANNEL_SUFFIXES = ["BaseColor", "Normal", "Roughness", "Metallic", "AO", "height", "opacity", "Specular", "gloss", "mask"]
+SEPARATORS = ["_", "-", "."]
+
+def MakeFilenames(count, seed=0):
+    rng = random.Random(seed)
+    extensions = channels.DEFAULT_CHANNELS["image_extensions"]
+    names = []
+    while len(names) < count:
+        asset = "%s%s%04d" % (rng.choice(["rock", "wood_plank", "metal-sheet", "fabric", "brick"]), rng.choice(SEPARATORS), rng.randrange(10000))
+        for suffix in CHANNEL_SUFFIXES:
+            names.append("%s_%s.%s" % (asset, suffix, rng.choice(extensions)))
+        names.append("%s_preview.txt" % asset)
+    return names[:count]
+
+def RunLegacy(filenames, channels_dict, case_insensitive):
+    pattern = channels.BuildLegacyRegex(channels_dict)
+    flags = re.IGNORECASE if case_insensitive else 0
+    extensions = tuple(channels_dict["image_extensions"])
+    lists = [channels_dict[key] for key in channels.CHANNEL_TYPES]
+    results = []
+    for filename in filenames:
+        if filename.endswith(extensions):
+            match = re.search(pattern, filename, flags=flags)
+            if match:
+                channel_name = match.group(2).lower() if case_insensitive else match.group(2)
+                channel_type = None
+                for key, values in zip(channels.CHANNEL_TYPES, lists):
+                    if channel_name in values:
+                        channel_type = key
+                        break
+                results.append((match.group(1), channel_type))
+    return results
+
+def RunClassifier(filenames, channels_dict, case_insensitive):
+    classifier = channels.ChannelClassifier(channels_dict, case_insensitive)
+    results = []
+    for filename in filenames:
+        if classifier.HasImageExtension(filename):
+            match = classifier.Match(filename)
+            if match:
+                results.append((match.prefix, match.channel_type))
+    return results
+
+def Time(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+def main(argv):
+    count = int(argv[0]) if argv and argv[0].isdigit() else 40000
+    case_insensitive = "--case-insensitive" in argv
+    channels_dict = channels.BuildChannelsDict(None, case_insensitive)
+    filenames = MakeFilenames(count)
+
+    legacy_time, legacy = Time(RunLegacy, filenames, channels_dict, case_insensitive)
+    classifier_time, compiled = Time(RunClassifier, filenames, channels_dict, case_insensitive)
+
+    print("files:       %d (case insensitive: %s)" % (count, case_insensitive))
+    print("regex:       %.3fs  %8.0f files/s" % (legacy_time, count / legacy_time))
+    print("classifier:  %.3fs  %8.0f files/s" % (classifier_time, count / classifier_time))
+    print("speedup:     %.2fx" % (legacy_time / classifier_time))
+    print("same result: %s" % (legacy == compiled))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
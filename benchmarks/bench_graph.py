@@ -0,0 +1,123 @@
+"""
+Graph construction cost of importTexturesToMaterial on the fake maxon backend.
+
+    python benchmarks/bench_graph.py [--materials N] [--call-cost-us US]
+                                     [--output results.json] [--baseline results.json]
+
+Builds materials for every combination of triplanar, color correct,
+scale / rotate / offset, sprite opacity and multiTex, the way import-from-folder
+does (batched transactions, deferred layout), and records per material the
+time, node count and number of graph API calls. API call counts are
+deterministic, so --baseline flags any combination that got more calls
+(or more than 25% slower).
+
+Runs without Cinema 4D, see fake_maxon.py.
+"""
+import argparse
+import contextlib
+import importlib.machinery
+import importlib.util
+import io
+import itertools
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import fake_maxon
+
+TEXTURE_SET = ["BaseColor", "Normal", "Roughness", "Metallic", "AO", "height", "opacity"]
+MULTITEX = {
+    "off": {"BASE": " ", "R": " ", "G": " ", "B": " "},
+    "orm": {"BASE": "AO", "R": "AO", "G": "Roughness", "B": "Metalness"},
+}
+OPTIONS = ["addTriplanar", "addCC", "addScaleRotOff", "spriteOpacity"]
+
+def LoadPlugin():
+    loader = importlib.machinery.SourceFileLoader("TexToMatO", os.path.join(ROOT, "TexToMatO.pyp"))
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    plugin = importlib.util.module_from_spec(spec)
+    loader.exec_module(plugin)
+    return plugin
+
+def Combinations():
+    for flags in itertools.product([False, True], repeat=len(OPTIONS)):
+        for multitex_name, multitex in MULTITEX.items():
+            material_arguments = dict(zip(OPTIONS, flags))
+            material_arguments.update({
+                "aoOverallTint": False,
+                "bumpFlipY": False,
+                "bumpLegacy": False,
+                "multiTex": dict(multitex),
+                "commitWindow": 64,
+            })
+            name = "+".join([option for option, flag in zip(OPTIONS, flags) if flag] + ["multiTex:" + multitex_name])
+            yield name, material_arguments
+
+def BuildMaterials(plugin, counter, material_arguments, count):
+    rs = plugin.rs
+    tex_tuples_list = [[(channel, "/textures/asset%d_%s.png" % (i, channel)) for channel in TEXTURE_SET] for i in range(count)]
+    counter.Reset()
+    nodes = 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with rs.RSBatchTransaction(material_arguments["commitWindow"], arrange=True) as batch:
+            for i, tex_tuples in enumerate(tex_tuples_list):
+                RSMaterial = rs.CreateStandardSurface("asset%d" % i)
+                batch.Add(RSMaterial)
+                plugin.importTexturesToMaterial(RSMaterial, tex_tuples, material_arguments)
+                nodes += len(RSMaterial.graph.nodes)
+    elapsed = time.perf_counter() - start
+    return {
+        "ms_per_material": elapsed / count * 1000.0,
+        "nodes_per_material": nodes / float(count),
+        "calls_per_material": counter.Total() / float(count),
+        "calls": {name: calls / float(count) for name, calls in sorted(counter.Snapshot().items())},
+    }
+
+def Compare(results, baseline):
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if result["calls_per_material"] > old["calls_per_material"]:
+            regressions.append("%s: %.1f -> %.1f API calls per material" % (name, old["calls_per_material"], result["calls_per_material"]))
+        if result["ms_per_material"] > old["ms_per_material"] * 1.25:
+            regressions.append("%s: %.2f -> %.2f ms per material" % (name, old["ms_per_material"], result["ms_per_material"]))
+    return regressions
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark material graph construction on the fake maxon backend.")
+    parser.add_argument("--materials", type=int, default=20, help="materials built per option combination")
+    parser.add_argument("--call-cost-us", type=float, default=0.0, help="simulated cost of every graph API call in microseconds")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    counter = fake_maxon.Install(call_cost=args.call_cost_us * 1e-6)
+    plugin = LoadPlugin()
+
+    results = {}
+    print("%-62s %9s %7s %9s" % ("combination", "ms/mat", "nodes", "API calls"))
+    for name, material_arguments in Combinations():
+        result = BuildMaterials(plugin, counter, material_arguments, args.materials)
+        results[name] = result
+        print("%-62s %9.2f %7.1f %9.1f" % (name, result["ms_per_material"], result["nodes_per_material"], result["calls_per_material"]))
+
+    if args.output:
+        with open(args.output, "w") as write_file:
+            json.dump(results, write_file, indent=4, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline, "r") as read_file:
+            regressions = Compare(results, json.load(read_file))
+        for regression in regressions:
+            print("[REGRESSION] " + regression)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
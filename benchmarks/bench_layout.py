@@ -0,0 +1,80 @@
+"""
+Timing and sanity checks of the layered node layout on synthetic material graphs.
+
+    python benchmarks/bench_layout.py [node_count] [graph_count]
+
+Checks that no two nodes overlap, that every wire runs from left to right
+and that laying out the same graph again gives the same positions. Exits
+with 1 if any graph fails a check, so it can gate CI.
+Runs without Cinema 4D.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from custom_redshift_api import node_layout
+
+def MakeGraph(node_count, seed):
+    """
+    Output <- material <- a few utility columns <- textures, plus a shared SRT block feeding every texture.
+    """
+    rng = random.Random(seed)
+    nodes = ["output", "material"]
+    edges = [("material", "output")]
+    sizes = {"material": (220.0, 480.0)}
+    frontier = ["material"]
+    while len(nodes) < node_count - 3:
+        node = "n%d" % len(nodes)
+        nodes.append(node)
+        target = rng.choice(frontier)
+        edges.append((node, target))
+        sizes[node] = (rng.choice([160.0, 200.0, 240.0]), rng.choice([80.0, 120.0, 200.0]))
+        if rng.random() < 0.5:
+            frontier.append(node)
+    for srt in ("SCALE", "OFFSET", "ROTATE"):
+        nodes.append(srt)
+        for node in nodes[2:-3]:
+            if rng.random() < 0.3:
+                edges.append((srt, node))
+    return nodes, edges, sizes
+
+def Check(nodes, edges, sizes, positions):
+    problems = []
+    for a, b in node_layout.Overlaps(positions, sizes):
+        problems.append("overlap %s %s" % (a, b))
+    for source, target in edges:
+        width = sizes.get(source, node_layout.DEFAULT_NODE_SIZE)[0]
+        if positions[source][0] + width > positions[target][0]:
+            problems.append("wire %s -> %s runs right to left" % (source, target))
+    if set(positions) != set(nodes):
+        problems.append("missing nodes")
+    return problems
+
+def main(argv):
+    node_count = int(argv[0]) if len(argv) > 0 else 100
+    graph_count = int(argv[1]) if len(argv) > 1 else 50
+    worst = 0.0
+    total = 0.0
+    failures = 0
+    for seed in range(graph_count):
+        nodes, edges, sizes = MakeGraph(node_count, seed)
+        start = time.perf_counter()
+        positions = node_layout.Layout(nodes, edges, sizes)
+        elapsed = time.perf_counter() - start
+        worst = max(worst, elapsed)
+        total += elapsed
+        problems = Check(nodes, edges, sizes, positions)
+        if node_layout.Layout(list(nodes), list(edges), dict(sizes)) != positions:
+            problems.append("positions differ between two runs")
+        if problems:
+            failures += 1
+            print("graph %d: %s" % (seed, "; ".join(problems[:5])))
+    print("graphs: %d x %d nodes" % (graph_count, node_count))
+    print("mean:   %.2f ms   worst: %.2f ms" % (total / graph_count * 1000.0, worst * 1000.0))
+    print("failed checks: %d" % failures)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,83 @@
+"""
+Planning throughput of textomato.build_plan over all option combinations.
+
+    python benchmarks/bench_plan.py [material_count]
+
+Plans every texture set once with an empty shape cache (cold) and once more
+with the shapes of the first pass cached (warm), and checks that cached plans
+equal plans built node by node. Exits with 1 if one differs.
+
+Runs without Cinema 4D.
+"""
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from textomato import build_plan, channels, image_probe
+
+CHANNEL_SETS = [
+    ["BaseColor", "Normal", "Roughness"],
+    ["BaseColor", "Normal", "Roughness", "Metallic", "AO"],
+    ["BaseColor", "Normal", "gloss", "Specular", "height", "opacity"],
+    ["BaseColor", "Normal", "Roughness", "Metallic", "AO", "height", "opacity", "Translucency", "mask"],
+]
+OPTIONS = ["addCC", "addTriplanar", "addScaleRotOff", "aoOverallTint", "spriteOpacity"]
+
+def MakeTextureSets(count, seed=0):
+    rng = random.Random(seed)
+    sets = []
+    for i in range(count):
+        asset = "D:/textures/asset_%05d/asset_%05d_" % (i, i)
+        sets.append([(channel, asset + channel + ".png") for channel in rng.choice(CHANNEL_SETS)])
+    return sets
+
+def MakeImageInfos(texture_sets, seed=0):
+    # Mixed headers so grayscale normals and 8 bit displacement give shapes of their own
+    rng = random.Random(seed)
+    image_infos = {}
+    for tex_tuples in texture_sets:
+        for _, filepath in tex_tuples:
+            image_infos[filepath] = image_probe.ImageInfo("png", 2048, 2048, rng.choice([1, 3]), rng.choice([8, 16]), False)
+    return image_infos
+
+def Combinations():
+    for flags in itertools.product([False, True], repeat=len(OPTIONS)):
+        arguments = dict(zip(OPTIONS, flags))
+        arguments.update({"bumpFlipY": False, "bumpLegacy": False, "multiTex": {"BASE": " ", "R": " ", "G": " ", "B": " "}})
+        yield arguments
+
+def main(argv):
+    count = int(argv[0]) if argv and argv[0].isdigit() else 5000
+    classifier = channels.GetClassifier()
+    texture_sets = MakeTextureSets(count)
+    image_infos = MakeImageInfos(texture_sets)
+
+    worst = {"cold": 0.0, "warm": 0.0, "uncached": 0.0}
+    total_ops = 0
+    mismatches = 0
+    for material_arguments in Combinations():
+        build_plan._shape_cache.clear()
+        for label in ("cold", "warm"):
+            start = time.perf_counter()
+            plans = [build_plan.PlanMaterial(tex_tuples, classifier, material_arguments, image_infos) for tex_tuples in texture_sets]
+            worst[label] = max(worst[label], time.perf_counter() - start)
+        start = time.perf_counter()
+        expected = [build_plan._PlanMaterial(tex_tuples, classifier, material_arguments, image_infos) for tex_tuples in texture_sets]
+        worst["uncached"] = max(worst["uncached"], time.perf_counter() - start)
+        mismatches += sum(plan != built for plan, built in zip(plans, expected))
+        assert len(set(plans)) == count  # hashable, one plan per texture set
+        total_ops += sum(sum(build_plan.PlanStats(plan).values()) for plan in plans)
+
+    combinations = 2 ** len(OPTIONS)
+    print("materials:     %d x %d option combinations" % (count, combinations))
+    for label in ("uncached", "cold", "warm"):
+        print("%-14s %.1f ms worst case for %d plans (%.1f us per plan)" % (label + ":", worst[label] * 1000.0, count, worst[label] / count * 1e6))
+    print("graph ops:     %.1f per plan on average" % (total_ops / float(count * combinations)))
+    print("mismatches:    %d" % mismatches)
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,97 @@
+"""
+Header probing of generated images, whole and cut short.
+
+    python benchmarks/bench_probe.py [file_count]
+
+Writes PNG and EXR headers to a temporary folder, checks what
+image_probe reads from them and times probing the folder through a cold and
+a warm ProbeCache. Truncated files (an export still being written) have to
+come back as None within PROBE_TIMEOUT seconds instead of hanging.
+
+Runs without Cinema 4D.
+"""
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from textomato import image_probe
+
+PROBE_TIMEOUT = 5.0
+
+def PNGHeader(width, height, bit_depth=8, color_type=2):
+    ihdr = struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", len(ihdr)) + b"IHDR" + ihdr + b"\0" * 4
+
+def _EXRAttribute(name, type_name, value):
+    return name + b"\0" + type_name + b"\0" + struct.pack("<i", len(value)) + value
+
+def EXRHeader(width, height, channel_names=(b"B", b"G", b"R"), pixel_type=1):
+    chlist = b"".join(name + b"\0" + struct.pack("<iB3xii", pixel_type, 0, 1, 1) for name in channel_names) + b"\0"
+    return (
+        b"v/1\x01" + struct.pack("<i", 2)
+        + _EXRAttribute(b"channels", b"chlist", chlist)
+        + _EXRAttribute(b"compression", b"compression", b"\0")
+        + _EXRAttribute(b"dataWindow", b"box2i", struct.pack("<iiii", 0, 0, width - 1, height - 1))
+        + b"\0"
+    )
+
+def Cases():
+    exr = EXRHeader(2048, 1024)
+    channels_end = exr.index(b"compression")
+    return [
+        ("png", PNGHeader(4096, 2048), image_probe.ImageInfo("png", 4096, 2048, 3, 8, False)),
+        ("exr", exr, image_probe.ImageInfo("exr", 2048, 1024, 3, 16, True)),
+        ("exr magic only", exr[:8], None),
+        ("exr cut in a name", exr[:12], None),
+        ("exr cut after channels", exr[:channels_end], None),
+        ("exr cut in a value", exr[:channels_end - 5], None),
+        ("exr cut before the end", exr[:-1], image_probe.ImageInfo("exr", 2048, 1024, 3, 16, True)),
+        ("png cut short", PNGHeader(16, 16)[:20], None),
+    ]
+
+def ProbeWithTimeout(filepath):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(image_probe.ProbeImage(filepath)), daemon=True)
+    thread.start()
+    thread.join(PROBE_TIMEOUT)
+    if thread.is_alive():
+        return "timeout"
+    return result[0]
+
+def main(argv):
+    count = int(argv[0]) if argv and argv[0].isdigit() else 2000
+    folder = tempfile.mkdtemp(prefix="textomato_probe_")
+    failed = 0
+    try:
+        for i, (label, data, expected) in enumerate(Cases()):
+            filepath = os.path.join(folder, "case%d" % i)
+            with open(filepath, "wb") as write_file:
+                write_file.write(data)
+            result = ProbeWithTimeout(filepath)
+            ok = result == expected
+            failed += not ok
+            print("%-24s %s" % (label, "ok" if ok else "FAILED: %r != %r" % (result, expected)))
+
+        filepaths = []
+        for i in range(count):
+            filepath = os.path.join(folder, "tex%d.%s" % (i, "exr" if i % 2 else "png"))
+            with open(filepath, "wb") as write_file:
+                write_file.write(EXRHeader(1024, 1024) if i % 2 else PNGHeader(1024, 1024))
+            filepaths.append(filepath)
+        cache = image_probe.ProbeCache()
+        for label in ("cold", "warm"):
+            start = time.perf_counter()
+            cache.Probe(filepaths)
+            elapsed = time.perf_counter() - start
+            print("%-24s %.3fs  %8.0f files/s" % (label + " cache", elapsed, count / elapsed))
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
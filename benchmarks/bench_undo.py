@@ -0,0 +1,106 @@
+"""
+Undo memory of the import undo modes on the fake maxon backend.
+
+    python benchmarks/bench_undo.py [--materials N] [--output results.json]
+
+For every undo mode of the plugin, imports N generated texture sets from a
+temporary folder (import-from-folder) and rebuilds N selected materials from
+their base texture (import-from-base) into a fresh document. Records the
+undo entries and the memory they would hold, estimated by the fake document
+(full material copies for UNDOTYPE_CHANGE, the edits of every graph
+transaction recorded for undo, references for new and deleted materials).
+The "small" mode still records an entry per material, only smaller ones,
+so KB/mat is where it differs from "material".
+
+Runs without Cinema 4D, see fake_maxon.py.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fake_maxon
+from bench_graph import LoadPlugin, TEXTURE_SET
+
+def MakeTextureFolder(count):
+    folder = tempfile.mkdtemp(prefix="textomato_undo_")
+    for i in range(count):
+        for channel in TEXTURE_SET:
+            open(os.path.join(folder, "asset%d_%s.png" % (i, channel)), "wb").close()
+    return folder
+
+def MaterialArguments(folder, undo_mode):
+    return {
+        "addCC": False, "addTriplanar": False, "addScaleRotOff": False, "aoOverallTint": False,
+        "bumpFlipY": False, "bumpLegacy": False, "spriteOpacity": False,
+        "caseInsensitive": False, "customRegex": False, "texFolder": folder,
+        "multiTex": {"BASE": " ", "R": " ", "G": " ", "B": " "},
+        "commitWindow": 64, "useTemplates": False, "profileImports": False, "probeImages": False,
+        "resolutionPolicy": "all", "convertTextures": False, "undoMode": undo_mode,
+    }
+
+def SelectBaseMaterials(plugin, doc, folder, count):
+    # Materials the way an .fbx import leaves them: a Standard Material with only its base color texture
+    with plugin.rs.RSBatchTransaction() as batch:
+        for i in range(count):
+            RSMaterial = plugin.rs.CreateStandardSurface("asset%d" % i)
+            batch.Add(RSMaterial)
+            RSMaterial.AddTexture("base", os.path.join(folder, "asset%d_BaseColor.png" % i))
+            doc.InsertMaterial(RSMaterial.material)
+            doc.SetActiveMaterial(RSMaterial.material, fake_maxon.SELECTION_ADD)
+
+def Measure(plugin, mode, folder, undo_mode, count):
+    doc = fake_maxon.ACTIVE_DOCUMENT = fake_maxon.BaseDocument()
+    material_arguments = MaterialArguments(folder, undo_mode)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode == "base":
+            SelectBaseMaterials(plugin, doc, folder, count)
+        doc.ResetUndo()
+        start = time.perf_counter()
+        if mode == "base":
+            plugin.importTexturesFromBase(derive_folder_from_base=True, material_arguments=material_arguments)
+        else:
+            plugin.importTexturesFromFolder(material_arguments)
+        elapsed = time.perf_counter() - start
+    return {
+        "undo_steps": doc.undo_steps,
+        "undo_entries": doc.undos,
+        "undo_kb_per_material": doc.UndoBytes() / 1024.0 / count,
+        "ms_per_material": elapsed / count * 1000.0,
+    }
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Measure the undo memory of the import undo modes on the fake maxon backend.")
+    parser.add_argument("--materials", type=int, default=200, help="materials imported per mode")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    fake_maxon.Install()
+    plugin = LoadPlugin()
+    plugin.folder_index = plugin.tfi.FolderIndex(os.path.join(tempfile.gettempdir(), "textomato_undo_index.json"))
+    folder = MakeTextureFolder(args.materials)
+
+    results = {}
+    try:
+        print("%-8s %-12s %6s %8s %10s %9s" % ("import", "undo mode", "steps", "entries", "KB/mat", "ms/mat"))
+        for mode in ("folder", "base"):
+            for undo_mode in plugin.UNDO_MODES:
+                result = Measure(plugin, mode, folder, undo_mode, args.materials)
+                results["%s:%s" % (mode, undo_mode)] = result
+                print("%-8s %-12s %6d %8d %10.2f %9.2f" % (mode, undo_mode, result["undo_steps"], result["undo_entries"], result["undo_kb_per_material"], result["ms_per_material"]))
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as write_file:
+            json.dump(results, write_file, indent=4, sort_keys=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,532 @@
+"""
+In-memory stand-in for the part of the c4d / maxon API that
+custom_redshift_api and TexToMatO.pyp use, for benchmarks only.
+
+    import fake_maxon
+    counter = fake_maxon.Install(call_cost=2e-6)
+    import custom_redshift_api.redshift_node as rs
+
+Graphs are plain Python objects. Every graph call (AddChild, FindChild,
+SetDefaultValue, Connect, BeginTransaction / Commit, GetDirectPredecessors, ...)
+is counted on the returned CallCounter and spends a simulated cost, so the
+number of API calls and their price can be compared between versions.
+Ports are created on first lookup: any id starting with the node's asset id
+is valid, anything else is an invalid port, like on a real node.
+
+Undo is modelled by its memory: the document keeps an estimate of what
+every AddUndo and every graph transaction recorded for undo would hold,
+see BaseDocument.UndoBytes.
+"""
+import copy
+import sys
+import time
+import types
+
+ASSET_ID_ATTRIBUTE = "net.maxon.node.attribute.assetid"
+OUTPUT_ASSET = "com.redshift3d.redshift4c4d.node.output"
+STANDARD_MATERIAL_ASSET = "com.redshift3d.redshift4c4d.nodes.core.standardmaterial"
+
+#=============================================
+#               Call counting
+#=============================================
+
+class CallCounter:
+    """
+    Counts fake API calls by name and burns `call_cost` seconds per call (busy wait, sleep is too coarse).
+    """
+
+    def __init__(self, call_cost=0.0, costs=None):
+        self.call_cost = call_cost
+        self.costs = costs or {}
+        self.counts = {}
+
+    def Call(self, name):
+        self.counts[name] = self.counts.get(name, 0) + 1
+        cost = self.costs.get(name, self.call_cost)
+        if cost:
+            end = time.perf_counter() + cost
+            while time.perf_counter() < end:
+                pass
+
+    def Total(self):
+        return sum(self.counts.values())
+
+    def Snapshot(self):
+        return dict(self.counts)
+
+    def Reset(self):
+        self.counts = {}
+
+COUNTER = CallCounter()
+
+def DeepSize(obj, seen=None):
+    """
+    Rough memory of everything reachable from obj through containers and instance attributes.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(DeepSize(key, seen) + DeepSize(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(DeepSize(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += DeepSize(obj.__dict__, seen)
+    return size
+
+def _Counted(function):
+    name = function.__name__
+    def Wrapper(*args, **kwargs):
+        COUNTER.Call(name)
+        return function(*args, **kwargs)
+    Wrapper.__name__ = name
+    return Wrapper
+
+#=============================================
+#               maxon
+#=============================================
+
+class Id(str):
+    pass
+
+class DataDictionary(dict):
+    def Set(self, key, value):
+        self[key] = value
+
+class Vector:
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x, self.y, self.z = x, y, z
+
+    def __eq__(self, other):
+        return isinstance(other, Vector) and (self.x, self.y, self.z) == (other.x, other.y, other.z)
+
+    def __repr__(self):
+        return "Vector(%r, %r, %r)" % (self.x, self.y, self.z)
+
+class _Constants:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+NODE_KIND = _Constants(NODE=1, INPUTS=2, OUTPUTS=4, INPORT=8, OUTPORT=16)
+PORT_DIR = _Constants(INPUT=0, OUTPUT=1)
+WIRE_MODE = _Constants(NORMAL=1)
+NIMBUS_PATH = _Constants(MATERIALENDNODE=1)
+UNDO_MODE = _Constants(START=0, ADD=1, NONE=2)
+UNDO_MODE_ATTRIBUTE = "net.maxon.nodes.undomode"
+
+class Wires:
+    def __init__(self, mode):
+        self.mode = mode
+
+class _AssetId:
+    # Indexes like the real maxon.IdAndVersion, repr like it: "(com.redshift3d...texturesampler,2.0)"
+    def __init__(self, asset_id):
+        self.asset_id = asset_id
+
+    def __getitem__(self, index):
+        return (Id(self.asset_id), "1.0")[index]
+
+    def __repr__(self):
+        return "(%s,1.0)" % self.asset_id
+
+class _InvalidPort:
+    def IsValid(self):
+        return False
+
+    def FindChild(self, name):
+        return self
+
+class Port:
+    def __init__(self, node, port_id, kind):
+        self.node = node
+        self.port_id = port_id
+        self.kind = kind
+        self.value = None
+        self.children = {}
+        self.sources = []
+        self.targets = []
+
+    def IsValid(self):
+        return True
+
+    @_Counted
+    def FindChild(self, name):
+        child = self.children.get(name)
+        if child is None:
+            child = self.children[name] = Port(self.node, self.port_id + "/" + name, self.kind)
+        return child
+
+    def GetChildren(self):
+        return list(self.children.values())
+
+    @_Counted
+    def SetDefaultValue(self, value):
+        self.node.graph.Journal("value", self.port_id, value)
+        self.value = value
+
+    @_Counted
+    def GetDefaultValue(self):
+        return self.value
+
+    @_Counted
+    def Connect(self, inPort):
+        self.node.graph.Journal("connect", self.port_id, inPort.port_id)
+        self.targets.append(inPort)
+        inPort.sources.append(self)
+
+    @_Counted
+    def RemoveConnections(self, direction, mask=None):
+        self.node.graph.Journal("disconnect", self.port_id, direction)
+        if direction == PORT_DIR.INPUT:
+            for source in self.sources:
+                source.targets.remove(self)
+            self.sources = []
+        else:
+            for target in self.targets:
+                target.sources.remove(self)
+            self.targets = []
+
+    @_Counted
+    def GetConnections(self, direction):
+        return [(port, None) for port in (self.sources if direction == PORT_DIR.INPUT else self.targets)]
+
+    def GetAncestor(self, kind):
+        return self.node
+
+    def GetId(self):
+        return self.port_id
+
+    def ToString(self):
+        return self.port_id
+
+    def __repr__(self):
+        return "Port(%s)" % self.port_id
+
+class PortList:
+    def __init__(self, node, kind):
+        self.node = node
+        self.kind = kind
+        self.ports = {}
+
+    @_Counted
+    def FindChild(self, port_id):
+        port = self.ports.get(port_id)
+        if port is None:
+            if self.node.asset_id is None or not port_id.startswith(self.node.asset_id + "."):
+                return _InvalidPort()
+            port = self.ports[port_id] = Port(self.node, port_id, self.kind)
+        return port
+
+    def GetChildren(self):
+        return list(self.ports.values())
+
+class GraphNode:
+    def __init__(self, graph, asset_id, path):
+        self.graph = graph
+        self.asset_id = asset_id
+        self.path = path
+        self.values = {}
+        self.children = []
+        self.inputs = PortList(self, NODE_KIND.INPUTS)
+        self.outputs = PortList(self, NODE_KIND.OUTPUTS)
+
+    def IsValid(self):
+        return True
+
+    def GetKind(self):
+        return NODE_KIND.NODE
+
+    def GetPath(self):
+        return self.path
+
+    def GetInputs(self):
+        return self.inputs
+
+    def GetOutputs(self):
+        return self.outputs
+
+    def GetChildren(self):
+        return list(self.children)
+
+    @_Counted
+    def GetValue(self, attribute):
+        if attribute == ASSET_ID_ATTRIBUTE:
+            return _AssetId(self.asset_id)
+        return self.values.get(attribute)
+
+    @_Counted
+    def SetValue(self, attribute, value):
+        self.graph.Journal("attribute", self.path, attribute, value)
+        self.values[attribute] = value
+
+    @_Counted
+    def Remove(self):
+        self.graph.Journal("remove", self.path, self.asset_id)
+        for port in self.inputs.ports.values():
+            port.RemoveConnections(PORT_DIR.INPUT)
+        for port in self.outputs.ports.values():
+            port.RemoveConnections(PORT_DIR.OUTPUT)
+        self.graph.root.children.remove(self)
+        del self.graph.nodes[self.path]
+
+    def ToString(self):
+        # Like the real node's string: short asset name @ node id
+        return "%s@%s" % ((self.asset_id or "").rsplit(".", 1)[-1], self.path)
+
+    def __repr__(self):
+        return "GraphNode(%s, %s)" % (self.path, self.asset_id)
+
+class GraphTransaction:
+    def __init__(self, graph, undo_mode):
+        self.graph = graph
+        self.undo_mode = undo_mode
+
+    @_Counted
+    def Commit(self):
+        self.graph.commits += 1
+        journal, self.graph.journal = self.graph.journal, None
+        # Graphs of materials that aren't in the document yet have no undo to record into
+        if journal and self.undo_mode != UNDO_MODE.NONE and self.graph in ACTIVE_DOCUMENT.graphs:
+            ACTIVE_DOCUMENT.AddGraphUndo(journal)
+
+class NodeGraph:
+    def __init__(self):
+        self.root = GraphNode(self, None, "")
+        self.nodes = {}
+        self.next_id = 0
+        self.commits = 0
+        self.journal = None # edits of the open transaction, what its undo entry would hold
+
+    def IsReadOnly(self):
+        return False
+
+    def GetRoot(self):
+        return self.root
+
+    def Journal(self, *edit):
+        if self.journal is not None:
+            self.journal.append(edit)
+
+    @_Counted
+    def AddChild(self, childId, assetId, args=None):
+        path = childId or "node%d" % self.next_id
+        self.next_id += 1
+        self.Journal("add", path, str(assetId))
+        node = GraphNode(self, str(assetId), path)
+        self.nodes[path] = node
+        self.root.children.append(node)
+        return node
+
+    @_Counted
+    def GetNode(self, path):
+        return self.nodes.get(path)
+
+    @_Counted
+    def BeginTransaction(self, userData=None):
+        self.journal = []
+        return GraphTransaction(self, (userData or {}).get(UNDO_MODE_ATTRIBUTE, UNDO_MODE.START))
+
+class GraphModelHelper:
+    @staticmethod
+    @_Counted
+    def GetDirectPredecessors(node, kind, result):
+        for port in node.inputs.ports.values():
+            for source in port.sources:
+                if source.node not in result:
+                    result.append(source.node)
+
+class NodesGraphModelRef:
+    pass
+
+#=============================================
+#               c4d
+#=============================================
+
+UNDOTYPE_NEW, UNDOTYPE_CHANGE, UNDOTYPE_CHANGE_SMALL, UNDOTYPE_DELETEOBJ = 0, 1, 2, 3
+SELECTION_NEW, SELECTION_ADD = 0, 1
+
+class NimbusRef:
+    def __init__(self, node_material):
+        self.node_material = node_material
+
+    def GetGraph(self):
+        return self.node_material.graph
+
+    def GetPath(self, which):
+        return self.node_material.end_node
+
+class NodeMaterial:
+    def __init__(self):
+        self.graph = None
+        self.end_node = None
+
+    @_Counted
+    def AddGraph(self, nodespace):
+        # New Redshift materials come with an output node fed by a Standard Material
+        self.graph = NodeGraph()
+        output = self.graph.AddChild("", OUTPUT_ASSET)
+        self.end_node = output.GetPath()
+        surface = output.GetInputs().FindChild(OUTPUT_ASSET + ".surface")
+        output.GetInputs().FindChild(OUTPUT_ASSET + ".displacement")
+        brdf = self.graph.AddChild("", STANDARD_MATERIAL_ASSET)
+        brdf.GetOutputs().FindChild(STANDARD_MATERIAL_ASSET + ".outcolor").Connect(surface)
+        return self.graph
+
+    def GetGraph(self, nodespace):
+        return self.graph
+
+class BaseMaterial:
+    def __init__(self, type_id=0):
+        self.name = ""
+        self.node_material = NodeMaterial()
+
+    def SetName(self, name):
+        self.name = name
+
+    def GetName(self):
+        return self.name
+
+    def GetNodeMaterialReference(self):
+        return self.node_material
+
+    def GetNimbusRef(self, nodespace):
+        return NimbusRef(self.node_material)
+
+    @_Counted
+    def GetClone(self, flags=0):
+        clone = BaseMaterial()
+        clone.name = self.name
+        clone.node_material = copy.deepcopy(self.node_material)
+        return clone
+
+    def Remove(self):
+        ACTIVE_DOCUMENT.RemoveMaterial(self)
+
+UNDO_ENTRY_BYTES = 64 # bookkeeping of one undo entry that only references its object
+
+class BaseDocument:
+    def __init__(self):
+        self.materials = []
+        self.graphs = set()
+        self.active_materials = []
+        self.undos = 0
+        self.undo_depth = 0
+        self.undo_steps = 0
+        self.undo_bytes = 0
+        self.undo_pointer = None
+
+    def StartUndo(self):
+        self.undo_depth += 1
+        if self.undo_depth == 1:
+            self.undo_steps += 1
+
+    def EndUndo(self):
+        self.undo_depth = max(0, self.undo_depth - 1)
+
+    def AddUndo(self, undo_type, item):
+        self.undos += 1
+        self.undo_pointer = item
+        if undo_type == UNDOTYPE_CHANGE:
+            # A full copy of the material, node graph included
+            self.undo_bytes += UNDO_ENTRY_BYTES + DeepSize(copy.deepcopy(item.node_material)) + DeepSize(item.name)
+        elif undo_type == UNDOTYPE_CHANGE_SMALL:
+            # Only the object's own container
+            self.undo_bytes += UNDO_ENTRY_BYTES + DeepSize(item.GetName())
+        else:
+            # New and deleted objects are kept by reference
+            self.undo_bytes += UNDO_ENTRY_BYTES
+
+    def AddGraphUndo(self, journal):
+        self.undos += 1
+        self.undo_bytes += UNDO_ENTRY_BYTES + DeepSize(journal)
+
+    def GetUndoPtr(self):
+        return self.undo_pointer
+
+    def UndoBytes(self):
+        return self.undo_bytes
+
+    def ResetUndo(self):
+        self.undos = 0
+        self.undo_steps = 0
+        self.undo_bytes = 0
+
+    def InsertMaterial(self, material):
+        self.materials.append(material)
+        self.graphs.add(material.node_material.graph)
+
+    def GetMaterials(self):
+        return list(self.materials)
+
+    def RemoveMaterial(self, material):
+        if material in self.materials:
+            self.materials.remove(material)
+            self.graphs.discard(material.node_material.graph)
+        if material in self.active_materials:
+            self.active_materials.remove(material)
+
+    def GetFirstObject(self):
+        # No objects, so no texture tags to reassign
+        return None
+
+    def SetActiveMaterial(self, material, mode=0):
+        if mode != SELECTION_ADD:
+            self.active_materials = []
+        if material is not None and material not in self.active_materials:
+            self.active_materials.append(material)
+
+    def GetActiveMaterials(self):
+        return list(self.active_materials)
+
+ACTIVE_DOCUMENT = BaseDocument()
+
+class _Dialog:
+    pass
+
+def _Module(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+def Install(call_cost=0.0, costs=None):
+    """
+    Puts the fake c4d and maxon modules into sys.modules and returns the call counter.
+    Refuses to replace real modules that are already imported.
+    """
+    for name in ("c4d", "maxon"):
+        module = sys.modules.get(name)
+        if module is not None and not getattr(module, "IS_FAKE", False):
+            raise RuntimeError("The real %s module is loaded, not installing the fake backend" % name)
+    COUNTER.call_cost = call_cost
+    COUNTER.costs = costs or {}
+    COUNTER.Reset()
+
+    graph = _Module("maxon.frameworks.graph", NODE_KIND=NODE_KIND, Wires=Wires, WIRE_MODE=WIRE_MODE, GraphNode=GraphNode)
+    misc = _Module("maxon.frameworks.misc", PORT_DIR=PORT_DIR)
+    frameworks = _Module("maxon.frameworks", graph=graph, misc=misc,
+                         nodes=_Module("maxon.frameworks.nodes"), nodespace=_Module("maxon.frameworks.nodespace"))
+    nodes = _Module("maxon.nodes", UndoMode=UNDO_MODE_ATTRIBUTE, UNDO_MODE=UNDO_MODE)
+    maxon = _Module("maxon", IS_FAKE=True, nodes=nodes, Id=Id, DataDictionary=DataDictionary, Vector=Vector, String=str,
+                    NODE=_Constants(BASE=_Constants(NAME="net.maxon.node.base.name")),
+                    EffectiveName="net.maxon.node.attribute.effectivename",
+                    NODE_KIND=NODE_KIND, NIMBUS_PATH=NIMBUS_PATH, GraphModelHelper=GraphModelHelper,
+                    GraphNode=GraphNode, NodesGraphModelRef=NodesGraphModelRef, frameworks=frameworks,
+                    neutron=_Constants(NODESPACE="net.maxon.neutron.nodespace", MSG_CREATE_IF_REQUIRED=0))
+    c4d = _Module("c4d", IS_FAKE=True, BaseMaterial=BaseMaterial, BaseObject=object, BaseList2D=object, Mmaterial=5703,
+                  COPYFLAGS_NONE=0, UNDOTYPE_NEW=UNDOTYPE_NEW, UNDOTYPE_CHANGE=UNDOTYPE_CHANGE,
+                  UNDOTYPE_CHANGE_SMALL=UNDOTYPE_CHANGE_SMALL, UNDOTYPE_DELETEOBJ=UNDOTYPE_DELETEOBJ,
+                  SELECTION_NEW=SELECTION_NEW, SELECTION_ADD=SELECTION_ADD,
+                  documents=_Module("c4d.documents", BaseDocument=BaseDocument, GetActiveDocument=lambda: ACTIVE_DOCUMENT),
+                  gui=_Module("c4d.gui", GeDialog=_Dialog, SubDialog=_Dialog),
+                  plugins=_Module("c4d.plugins", CommandData=object),
+                  EventAdd=lambda *args: None, SpecialEventAdd=lambda *args: None,
+                  StatusSetText=lambda *args: None, StatusSetBar=lambda *args: None, StatusClear=lambda: None)
+    sys.modules.update({
+        "maxon": maxon, "maxon.frameworks": frameworks, "maxon.frameworks.graph": graph, "maxon.frameworks.misc": misc,
+        "maxon.nodes": nodes, "maxon.frameworks.nodes": frameworks.nodes, "maxon.frameworks.nodespace": frameworks.nodespace,
+        "c4d": c4d, "c4d.documents": c4d.documents, "c4d.gui": c4d.gui, "c4d.plugins": c4d.plugins,
+    })
+    return COUNTER
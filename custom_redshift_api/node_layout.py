@@ -0,0 +1,184 @@
+#  Layered node layout
+#
+#  Sugiyama style layout for material graphs: nodes are put into columns by
+#  their distance to the output, ordered inside each column to reduce wire
+#  crossings and then stacked without overlaps.
+#
+#  Pure Python, no c4d / maxon imports, so it can be used and checked headless.
+#
+#  Cost is O(SWEEPS * (V + E') * log V) where E' counts the edges after long
+#  edges are split into one-column dummy segments; 100 node materials lay out
+#  in a few milliseconds.
+#
+
+DEFAULT_NODE_SIZE = (200.0, 120.0)
+COLUMN_SPACING = 80.0
+ROW_SPACING = 30.0
+SWEEPS = 4
+
+def _Layers(nodes, succ, pred):
+    """
+    Column of every node, 0 being the sinks (the output node) and growing to the left.
+    Nodes without any wire go into the leftmost column next to the textures.
+    """
+    layer = {}
+    order = sorted(nodes, key=lambda n: len(succ[n]) != 0)
+    visiting = set()
+
+    def Visit(node):
+        if node in layer:
+            return layer[node]
+        visiting.add(node)
+        value = 0
+        for target in succ[node]:
+            if target in visiting:  # cycle, ignore the back edge
+                continue
+            value = max(value, Visit(target) + 1)
+        visiting.discard(node)
+        layer[node] = value
+        return value
+
+    # Recursive, material graphs are only a handful of columns deep
+    for node in order:
+        if succ[node] or pred[node]:
+            Visit(node)
+    depth = max(layer.values()) if layer else 0
+    for node in nodes:
+        if node not in layer:
+            layer[node] = depth
+    return layer
+
+def Layout(nodes, edges, sizes=None, column_spacing=COLUMN_SPACING, row_spacing=ROW_SPACING):
+    """
+    Computes node positions for a directed graph flowing from left to right.
+
+    Parameters
+    ----------
+    nodes : list
+        Hashable node keys, their order is used to break ties deterministically.
+    edges : list
+        (source, target) pairs, source feeds an input of target. Their order is the port order.
+    sizes : dict
+        node -> (width, height), DEFAULT_NODE_SIZE for missing nodes.
+
+    Returns
+    -------
+    dict
+        node -> (x, y) of the node's upper left corner.
+    """
+    sizes = sizes or {}
+    nodes = list(dict.fromkeys(nodes))
+    index = {node: i for i, node in enumerate(nodes)}
+    succ = {node: [] for node in nodes}
+    pred = {node: [] for node in nodes}
+    for source, target in edges:
+        if source in index and target in index and source != target and target not in succ[source]:
+            succ[source].append(target)
+            pred[target].append(source)
+
+    layer = _Layers(nodes, succ, pred)
+
+    # Split edges spanning several columns into dummy segments
+    seg_pred = {node: [] for node in nodes}
+    seg_succ = {node: [] for node in nodes}
+    for source in nodes:
+        for target in succ[source]:
+            if layer[source] <= layer[target]:
+                continue  # back edge of a cycle
+            previous = source
+            for column in range(layer[source] - 1, layer[target], -1):
+                dummy = ("__dummy__", index[source], index[target], column)
+                layer[dummy] = column
+                seg_pred[dummy] = []
+                seg_succ[dummy] = []
+                seg_succ[previous].append(dummy)
+                seg_pred[dummy].append(previous)
+                previous = dummy
+            seg_succ[previous].append(target)
+            seg_pred[target].append(previous)
+
+    columns = {}
+    # Initial order: walk from the sinks along inputs in port order
+    seen = set()
+    stack = [node for node in nodes if layer[node] == 0][::-1]
+    walk = []
+    while stack:
+        node = stack.pop()
+        if node in seen:
+            continue
+        seen.add(node)
+        walk.append(node)
+        stack.extend(reversed(seg_pred[node]))
+    walk += [node for node in layer if node not in seen]
+    for node in walk:
+        columns.setdefault(layer[node], []).append(node)
+    column_ids = sorted(columns)
+
+    # Barycenter sweeps, alternating direction
+    position = {}
+    for column in column_ids:
+        for i, node in enumerate(columns[column]):
+            position[node] = i
+    for sweep in range(SWEEPS):
+        if sweep % 2 == 0:
+            ids, neighbours = column_ids[1:], seg_succ  # right to left, fixed column is on the right
+        else:
+            ids, neighbours = column_ids[-2::-1], seg_pred
+        for column in ids:
+            def Key(node):
+                linked = neighbours[node]
+                if not linked:
+                    return (position[node], position[node])
+                return (sum(position[n] for n in linked) / len(linked), position[node])
+            columns[column].sort(key=Key)
+            for i, node in enumerate(columns[column]):
+                position[node] = i
+
+    # Coordinates: columns right to left, nodes stacked top to bottom
+    def Size(node):
+        if isinstance(node, tuple) and node and node[0] == "__dummy__":
+            return (0.0, 0.0)
+        return sizes.get(node, DEFAULT_NODE_SIZE)
+
+    result = {}
+    x = 0.0
+    column_x = {}
+    for column in column_ids:
+        width = max(Size(node)[0] for node in columns[column])
+        x -= width
+        column_x[column] = x
+        x -= column_spacing
+    placed_y = {}
+    for column in column_ids:
+        y = None
+        for node in columns[column]:
+            height = Size(node)[1]
+            # Pull towards the already placed successors, never above the previous node
+            linked = [placed_y[n] for n in seg_succ[node] if n in placed_y]
+            wanted = sum(linked) / len(linked) if linked else 0.0
+            top = wanted if y is None else max(wanted, y)
+            placed_y[node] = top
+            y = top + height + (row_spacing if height else 0.0)
+        for node in columns[column]:
+            if node in index:
+                result[node] = (column_x[column], placed_y[node])
+    return result
+
+def Overlaps(positions, sizes=None):
+    """
+    Returns the pairs of nodes whose rectangles overlap, for checking a layout.
+    """
+    sizes = sizes or {}
+    boxes = []
+    for node, (x, y) in positions.items():
+        width, height = sizes.get(node, DEFAULT_NODE_SIZE)
+        boxes.append((x, y, x + width, y + height, node))
+    boxes.sort(key=lambda box: box[:4])
+    found = []
+    for i, (x0, y0, x1, y1, node) in enumerate(boxes):
+        for ox0, oy0, ox1, oy1, other in boxes[i + 1:]:
+            if ox0 >= x1:
+                break
+            if oy0 < y1 and y0 < oy1:
+                found.append((node, other))
+    return found
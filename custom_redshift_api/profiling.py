@@ -0,0 +1,171 @@
+#  Import profiling
+#
+#  Wall time per phase and counts of graph operations for one import run,
+#  split per material. RedshiftNodeMaterial and the importers report into the
+#  active profile through the module level Phase / Count calls, which do
+#  nothing while no profile is active.
+#
+#  Pure Python, no c4d / maxon imports.
+#
+import json
+import os
+import time
+
+MAX_STORED_RUNS = 50
+
+_active = None
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+class _Phase:
+    def __init__(self, profile, name, per_material):
+        self.profile = profile
+        self.name = name
+        self.per_material = per_material
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.profile.AddTime(self.name, time.perf_counter() - self.start, self.per_material)
+        return False
+
+def _AddTo(stats, name, elapsed):
+    entry = stats.get(name)
+    if entry is None:
+        entry = stats[name] = [0.0, 0]
+    entry[0] += elapsed
+    entry[1] += 1
+
+def _Rounded(stats):
+    return {name: {"time": round(elapsed, 6), "count": count} for name, (elapsed, count) in sorted(stats.items())}
+
+class ImportProfile:
+    """
+    Timings and operation counts of one import run.
+
+    Parameters
+    ----------
+    mode : str
+        Which import produced the run, e.g. "folder" or "base".
+    """
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.started = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.start = time.perf_counter()
+        self.total = None
+        self.phases = {}
+        self.operations = {}
+        self.materials = []
+        self.material = None
+
+    def AddTime(self, name, elapsed, per_material=True):
+        _AddTo(self.phases, name, elapsed)
+        if per_material and self.material is not None:
+            _AddTo(self.material["phases"], name, elapsed)
+
+    def AddCount(self, name, count=1, per_material=True):
+        self.operations[name] = self.operations.get(name, 0) + count
+        if per_material and self.material is not None:
+            operations = self.material["operations"]
+            operations[name] = operations.get(name, 0) + count
+
+    def BeginMaterial(self, name):
+        """
+        Starts the record of a material, phases and operations until EndMaterial are added to it.
+        """
+        self.EndMaterial()
+        self.material = {"name": name, "start": time.perf_counter(), "phases": {}, "operations": {}}
+
+    def EndMaterial(self):
+        if self.material is None:
+            return
+        material = self.material
+        self.material = None
+        self.materials.append({
+            "name": material["name"],
+            "time": round(time.perf_counter() - material["start"], 6),
+            "phases": _Rounded(material["phases"]),
+            "operations": dict(sorted(material["operations"].items())),
+        })
+
+    def Finish(self):
+        self.EndMaterial()
+        if self.total is None:
+            self.total = time.perf_counter() - self.start
+
+    def ToDict(self):
+        return {
+            "mode": self.mode,
+            "started": self.started,
+            "time": round(self.total if self.total is not None else time.perf_counter() - self.start, 6),
+            "phases": _Rounded(self.phases),
+            "operations": dict(sorted(self.operations.items())),
+            "materials": self.materials,
+        }
+
+    def Summary(self):
+        """
+        Returns a few lines with the run total, the phases by time and the operation counts.
+        """
+        data = self.ToDict()
+        lines = ["Import profile (%s): %d materials in %.3fs" % (self.mode, len(self.materials), data["time"])]
+        for name, entry in sorted(data["phases"].items(), key=lambda item: -item[1]["time"]):
+            lines.append("  %-12s %8.3fs  %6dx" % (name, entry["time"], entry["count"]))
+        lines.append("  " + ", ".join("%s %d" % item for item in data["operations"].items()))
+        return "\n".join(lines)
+
+    def Append(self, profile_file):
+        """
+        Adds this run to a JSON file of runs, keeping the last MAX_STORED_RUNS.
+        """
+        runs = []
+        try:
+            with open(profile_file, "r") as read_file:
+                runs = json.load(read_file).get("runs", [])
+        except (OSError, ValueError):
+            pass
+        runs = (runs + [self.ToDict()])[-MAX_STORED_RUNS:]
+        directory = os.path.dirname(profile_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            with open(profile_file, "w") as write_file:
+                json.dump({"runs": runs}, write_file, indent=1)
+        except OSError as e:
+            print("[WARNING] Could not write import profile: " + str(e))
+
+def SetActive(profile):
+    """
+    Makes `profile` receive the Phase / Count reports, None switches profiling off.
+    """
+    global _active
+    _active = profile
+
+def GetActive():
+    return _active
+
+def Phase(name, per_material=True):
+    """
+    Context manager timing a phase of the active profile.
+    Phases run for a whole batch (commits, layout) pass per_material=False.
+    """
+    if _active is None:
+        return _NULL_PHASE
+    return _Phase(_active, name, per_material)
+
+def Count(name, count=1, per_material=True):
+    """
+    Counts a graph operation on the active profile.
+    """
+    if _active is not None:
+        _active.AddCount(name, count, per_material)
@@ -11,6 +11,7 @@
 #
 #  To be Continued
 #
+import sys
 import maxon
 RS_SHADER_PREFIX = "com.redshift3d.redshift4c4d.nodes.core."
 RS_STANDARD_SURFACE_PREFIX = "com.redshift3d.redshift4c4d.nodes.core.standardmaterial."
@@ -289,11 +290,16 @@ def StrNodeID(node_name):
     """
     realID = RS_SHADER_PREFIX + node_name
     return realID
+_PortIDs = {}
 def StrPortID(node_name, port_name):
     """
     Returns the full ID of a given nodes port given the port's name
+    The strings are interned, so repeated calls return the very same object instead of concatenating again.
     """
-    realID = RS_SHADER_PREFIX + node_name +  '.' + port_name
+    realID = _PortIDs.get((node_name, port_name))
+    if realID is None:
+        realID = sys.intern(RS_SHADER_PREFIX + node_name +  '.' + port_name)
+        _PortIDs[(node_name, port_name)] = realID
     return realID
 def StrtoMaxonID(ID_string):
     """
@@ -28,12 +28,16 @@
 #=============================================
 #                   Libs
 #=============================================
+import time
+from collections import deque
 import c4d
 import maxon
 import maxon.frameworks.nodespace
 import maxon.frameworks.nodes
 import maxon.frameworks.graph
 from . import redshift_ID as rsID # Commonly Used IDs for Redshift
+from . import node_layout # Pure python layered layout
+from . import profiling # Import run timings and operation counts
 #=============================================
 #                   ID
 #=============================================
@@ -46,6 +50,9 @@ ImageNodeID = rsID.StrtoMaxonID(rsID.StrNodeID("texturesampler"))
 ColorCorrectionNodeID = rsID.StrtoMaxonID(rsID.StrNodeID("rscolorcorrection"))              # maxon.Id("com.redshift3d.redshift4c4d.nodes.core.rscolorcorrection") # color correct
 StandardOutputPort = rsID.PortStr.standard_outcolor                                         # "com.redshift3d.redshift4c4d.nodes.core.standardmaterial.outcolor"
 OutputSurfacePort = rsID.PortStr.Output_Surface                                             # "com.redshift3d.redshift4c4d.node.output.surface"
+OutputPortPrefix = rsID.ShaderStr.Output + "."                                              # "com.redshift3d.redshift4c4d.node.output."
+TextureTex0Port = rsID.StrPortID("texturesampler", "tex0")                                  # "com.redshift3d.redshift4c4d.nodes.core.texturesampler.tex0"
+SpriteTex0Port = rsID.StrPortID("sprite", "tex0")                                           # "com.redshift3d.redshift4c4d.nodes.core.sprite.tex0"
 
 RS_NODESPACE = "com.redshift3d.redshift4c4d.class.nodespace" # node space
 RS_MATERIAL_END_NODE = "com.autodesk.Redshift.material"      # old mat
@@ -55,6 +62,24 @@ RS_NODESPACE = "com.redshift3d.redshift4c4d.class.nodespace" # node space
 RS_MATERIAL_END_NODE = "com.autodesk.Redshift.material"
 RS_SHADER_PREFIX = "com.redshift3d.redshift4c4d.nodes.core."
 
+NODE_POSITION_ATTRIBUTE = "net.maxon.node.attribute.position" # node editor position
+# Rough node editor sizes (width, height) used to space the layout, everything else uses node_layout.DEFAULT_NODE_SIZE
+LAYOUT_NODE_SIZES = {
+    "standardmaterial": (220.0, 520.0),
+    "texturesampler": (200.0, 200.0),
+    "triplanar": (200.0, 220.0),
+    "rscolorlayer": (200.0, 260.0),
+    "rscolorcorrection": (200.0, 160.0),
+    "sprite": (200.0, 180.0),
+}
+
+# Debug: check the memoized output node / root BRDF against a fresh lookup on every access
+VERIFY_ROOT_CACHE = False
+# Debug: check the shader index against a fresh walk of the graph on every access
+VERIFY_SHADER_INDEX = False
+
+GROUP_ASSET_ID = "net.maxon.node.group" # node groups, _CollectShaders walks into them
+
 ID_PREFERENCES_NODE = 465001632 # Prefs ID
 ID_REDSHIFT = 1036219 # Redshift
 
@@ -173,6 +198,19 @@ class RedshiftNodeMaterial:
         self.material = material
         self.graph = None
         self.nimbusRef = self.material.GetNimbusRef(RS_NODESPACE)
+        # Memoized output node and root BRDF, reset by _InvalidateRoot
+        self._rsOutput = None
+        self._rootBRDF = None
+        # Resolved port handles keyed by (id(node), port id, is output), the node is kept alive in the value so its id stays unique
+        self._portCache = {}
+        # Shader index built by _IndexShaders: node path -> (asset id, node) in graph order, and asset id -> {node path: node}
+        self._shaderIndex = None
+        self._shadersByAsset = None
+        # Adjacency index built by _IndexConnections: node path -> {port id: [connections]}, into (incoming) and out of (outgoing) each shader
+        self._incoming = None
+        self._outgoing = None
+        self.portLookups = 0
+        self.portCacheHits = 0
         #self.node = maxon.GraphNode # Type of 5 :[true node,  input port, output port, input port list, output port list]
         if self.material is not None:
             nodeMaterial = self.material.GetNodeMaterialReference()
@@ -182,6 +220,21 @@ class RedshiftNodeMaterial:
 
 # =====  Add  ===== #
 
+    # [private]
+    def _AddNode(self, assetId):
+        """
+        Private function adding a node to the graph and to the shader index.
+
+        Parameters
+        ----------
+        assetId : str
+            The full asset id of the node.
+        """
+        shader = self.graph.AddChild("", assetId, maxon.DataDictionary())
+        if shader is not None and self._shaderIndex is not None:
+            self._IndexShader(str(assetId), shader)
+        return shader
+
     # 创建材质 ==> OK
     def Create(name):
         """
@@ -222,10 +275,11 @@ class RedshiftNodeMaterial:
         if self.graph is None:
             return None
         
+        profiling.Count("AddShader")
         if useStr == True:
-            shader = self.graph.AddChild("", "com.redshift3d.redshift4c4d.nodes.core." + nodeId, maxon.DataDictionary())
+            shader = self._AddNode(RS_SHADER_PREFIX + nodeId)
         else:
-            shader = self.graph.AddChild("", nodeId, maxon.DataDictionary())
+            shader = self._AddNode(nodeId)
 
         return shader  
     # 创建color correct ==> OK
@@ -237,7 +291,7 @@ class RedshiftNodeMaterial:
         if self.graph is None:
             return None
         nodeId = "rscolorcorrection"
-        shader = self.graph.AddChild("", "com.redshift3d.redshift4c4d.nodes.core." + nodeId, maxon.DataDictionary())
+        shader = self._AddNode(RS_SHADER_PREFIX + nodeId)
 
         return shader     
     # 创建ramp ==> OK
@@ -249,7 +303,7 @@ class RedshiftNodeMaterial:
         if self.graph is None:
             return None
         nodeId = "rsramp"
-        shader = self.graph.AddChild("", "com.redshift3d.redshift4c4d.nodes.core." + nodeId, maxon.DataDictionary())
+        shader = self._AddNode(RS_SHADER_PREFIX + nodeId)
 
         return shader   
     # 创建scalar ramp ==> OK
@@ -262,7 +316,7 @@ class RedshiftNodeMaterial:
         if self.graph is None:
             return None
         nodeId = "rsscalarramp"
-        shader = self.graph.AddChild("", "com.redshift3d.redshift4c4d.nodes.core." + nodeId, maxon.DataDictionary())
+        shader = self._AddNode(RS_SHADER_PREFIX + nodeId)
 
         return shader       
     # 创建maxon noise ==> OK
@@ -274,7 +328,7 @@ class RedshiftNodeMaterial:
         if self.graph is None:
             return None
         nodeId = "maxonnoise"
-        shader = self.graph.AddChild("", "com.redshift3d.redshift4c4d.nodes.core." + nodeId, maxon.DataDictionary())
+        shader = self._AddNode(RS_SHADER_PREFIX + nodeId)
 
         return shader      
     # 创建displacement ==> OK
@@ -286,7 +340,7 @@ class RedshiftNodeMaterial:
         if self.graph is None:
             return None
         nodeId = "displacement"
-        shader = self.graph.AddChild("", "com.redshift3d.redshift4c4d.nodes.core." + nodeId, maxon.DataDictionary())
+        shader = self._AddNode(RS_SHADER_PREFIX + nodeId)
 
         return shader     
     # todo AddTexture ==> 设置贴图ok 名称ok 贴图路径ok raw\sRGB ok 
@@ -297,11 +351,12 @@ class RedshiftNodeMaterial:
         """
         if self.graph is None:
             return None
+        profiling.Count("AddTexture")
         nodeId = "texturesampler"
-        shader = self.graph.AddChild("", "com.redshift3d.redshift4c4d.nodes.core." + nodeId, maxon.DataDictionary())
-        texPort = shader.GetInputs().FindChild("com.redshift3d.redshift4c4d.nodes.core.texturesampler.tex0")
-        texFilenamePort = texPort.FindChild('path')
-        colorspacePort = texPort.FindChild("colorspace")
+        shader = self._AddNode(RS_SHADER_PREFIX + nodeId)
+        texPort = self._FindPort(shader, TextureTex0Port)
+        texFilenamePort = self._FindSubPort(texPort, 'path')
+        colorspacePort = self._FindSubPort(texPort, "colorspace")
         texFilenamePort.SetDefaultValue(filepath)
         colorspacePort.SetDefaultValue(colorspace)
         self.SetShaderName(shader,shadername)
@@ -313,14 +368,30 @@ class RedshiftNodeMaterial:
         """
         if self.graph is None:
             return None
+        profiling.Count("AddSprite")
         nodeId = "sprite"
-        shader = self.graph.AddChild("", "com.redshift3d.redshift4c4d.nodes.core." + nodeId, maxon.DataDictionary())
-        texPort = shader.GetInputs().FindChild("com.redshift3d.redshift4c4d.nodes.core.sprite.tex0")
-        texFilenamePort = texPort.FindChild('path')
-        colorspacePort = texPort.FindChild("colorspace")
+        shader = self._AddNode(RS_SHADER_PREFIX + nodeId)
+        texPort = self._FindPort(shader, SpriteTex0Port)
+        texFilenamePort = self._FindSubPort(texPort, 'path')
+        colorspacePort = self._FindSubPort(texPort, "colorspace")
         texFilenamePort.SetDefaultValue(filepath)
         colorspacePort.SetDefaultValue(colorspace)
         return shader 
+    # 设置贴图路径
+    def SetTexturePath(self, shader, filepath):
+        """
+        Sets the file path of a texture or sprite shader.
+        """
+        if shader is None:
+            return None
+        profiling.Count("SetTexturePath")
+        texPort = self._FindPort(shader, TextureTex0Port)
+        if not self.IsPortValid(texPort):
+            texPort = self._FindPort(shader, SpriteTex0Port)
+        if not self.IsPortValid(texPort):
+            print("[WARNING] Shader '%r' has no texture port" % shader)
+            return None
+        self._FindSubPort(texPort, 'path').SetDefaultValue(filepath)
 # =====  Add To  ===== #   
 
     # 创建Shader并连接到指定节点的指定端口 ==> OK
@@ -366,6 +437,53 @@ class RedshiftNodeMaterial:
     # todo 创建texture 并通过displacement node链接到output的置换端口 ==> to check
     
 # =====  Get  ===== #   
+
+    # [private]
+    # 缓存端口查找
+    def _FindPort(self, shader, portId, output=False):
+        """
+        Private function resolving an input (or output) port of a shader, cached per material.
+
+        Parameters
+        ----------
+        shader : maxon.frameworks.graph.GraphNode
+            The shader node.
+        portId : str
+            Full port id.
+        output : bool
+            True to search the outputs instead of the inputs.
+        """
+        if not isinstance(portId, str):
+            self.portLookups += 1
+            profiling.Count("FindChild")
+            return (shader.GetOutputs() if output else shader.GetInputs()).FindChild(portId)
+        key = (id(shader), portId, output)
+        entry = self._portCache.get(key)
+        if entry is not None:
+            self.portCacheHits += 1
+            return entry[1]
+        self.portLookups += 1
+        profiling.Count("FindChild")
+        port = (shader.GetOutputs() if output else shader.GetInputs()).FindChild(portId)
+        if self.IsPortValid(port):
+            self._portCache[key] = (shader, port)
+        return port
+
+    # [private]
+    def _FindSubPort(self, port, name):
+        """
+        Private function resolving a child port (e.g. 'path' of tex0), counted like _FindPort.
+        """
+        self.portLookups += 1
+        profiling.Count("FindChild")
+        return port.FindChild(name)
+
+    # 端口查找统计
+    def GetPortStats(self):
+        """
+        Returns the port lookup counters of this material: FindChild calls made and lookups answered from the cache.
+        """
+        return {"lookups": self.portLookups, "cached": self.portCacheHits}
   
     # 获取节点上端口
     def GetPort(self,shader, port_name):
@@ -383,7 +501,7 @@ class RedshiftNodeMaterial:
             return None
         if not shader:
             return None
-        port = shader.GetInputs().FindChild(port_name)
+        port = self._FindPort(shader, port_name)
         return port   
     # 端口合法 ==> OK
     def IsPortValid(self, port):
@@ -431,11 +549,25 @@ class RedshiftNodeMaterial:
             The shader node.
         display: print info when display is True
         """
-        res = shader.GetValue("net.maxon.node.attribute.assetid")
-        assetId = ("%r"%res)[1:].split(",")[0]
+        entry = None
+        if self._shaderIndex is not None:
+            entry = self._shaderIndex.get(str(shader.GetPath()))
+        assetId = entry[0] if entry is not None else self._ReadAssetId(shader)
         if display == True:
-            print("AssetID = " + ("%r"%res)[1:].split(",")[0])
+            print("AssetID = " + assetId)
         return assetId  
+
+    # [private]
+    def _ReadAssetId(self, node):
+        """
+        Private function reading the asset id of a node, without the shader index.
+        """
+        res = node.GetValue("net.maxon.node.attribute.assetid")
+        try:
+            # maxon.IdAndVersion
+            return str(res[0])
+        except Exception:
+            return ("%r"%res)[1:].split(",")[0]
     # 获取ShaderID ==> OK  
     def GetShaderId(self, shader):
         """
@@ -470,7 +602,7 @@ class RedshiftNodeMaterial:
         if shader is None or paramId is None:
             return None
 
-        port = shader.GetInputs().FindChild(paramId)
+        port = self._FindPort(shader, paramId)
         if not self.IsPortValid(port):
             return None   
         if display == True:
@@ -493,40 +625,85 @@ class RedshiftNodeMaterial:
         if shader is None or paramId is None:
             return None
         # standard data type
-        port = shader.GetInputs().FindChild(paramId)
+        port = self._FindPort(shader, paramId)
         if not self.IsPortValid(port):
             print("[Error] Input port '%s' is not found on shader '%r'" % (paramId, shader))
             return None
         if display == True:
             print(port.GetDefaultValue()) 
         return port.GetDefaultValue()    
+    # 获取贴图路径
+    def GetTexturePath(self, shader):
+        """
+        Returns the file path of a texture or sprite shader, None for other shaders.
+        """
+        if shader is None:
+            return None
+        texPort = self._FindPort(shader, TextureTex0Port)
+        if not self.IsPortValid(texPort):
+            texPort = self._FindPort(shader, SpriteTex0Port)
+        if not self.IsPortValid(texPort):
+            return None
+        path = self._FindSubPort(texPort, 'path').GetDefaultValue()
+        return str(path) if path is not None else None
+    # 获取所有贴图路径
+    def GetTexturePaths(self):
+        """
+        Returns the file paths of all texture and sprite shaders of the graph.
+        """
+        paths = []
+        for shaderId in ("texturesampler", "sprite"):
+            for shader in self.GetShadersByType(shaderId):
+                path = self.GetTexturePath(shader)
+                if path:
+                    paths.append(path)
+        return paths
     # 获取Output Node==> OK 
     def GetRSOutput(self):
         """
         Returns the Redshift Output node.
+        Memoized, see _InvalidateRoot for what resets it.
         """
         if self.graph is None:
             print("NO GRAPH DOUNS")
             return None
+        if self._rsOutput is None:
+            self._rsOutput = self._LookupRSOutput()
+        elif VERIFY_ROOT_CACHE:
+            self._rsOutput = self._VerifyCached("Output node", self._rsOutput, self._LookupRSOutput())
+        return self._rsOutput
+
+    # [private]
+    def _LookupRSOutput(self):
+        """
+        Private function finding the Redshift Output node without the memo.
+        """
         try:
             endNodePath = self.nimbusRef.GetPath(maxon.NIMBUS_PATH.MATERIALENDNODE)
             shader = self.graph.GetNode(endNodePath)
             return shader
         except:
-            for shader in self.GetShaders(False):
-                if self.GetAssetId(shader) == OutputMaterialAssetID:
-                    return shader
-            return None    
+            return self.FindFirstShader(str(OutputMaterialAssetID))
     # 获取Root BRDF ==> OK  BRDF:standard surface / rs material 
     def GetRootBRDF(self):
         """
         Returns the shader connect to redshift output (maxon.frameworks.graph.GraphNode)
+        Memoized, see _InvalidateRoot for what resets it.
         """
         if self.graph is None:
             return None
+        if self._rootBRDF is None:
+            self._rootBRDF = self._LookupRootBRDF()
+        elif VERIFY_ROOT_CACHE:
+            self._rootBRDF = self._VerifyCached("Root BRDF", self._rootBRDF, self._LookupRootBRDF())
+        return self._rootBRDF
 
+    # [private]
+    def _LookupRootBRDF(self):
+        """
+        Private function finding the shader connected to the output without the memo.
+        """
         endNode = self.GetRSOutput()
-        print("endNode : " + str(endNode))
         if endNode is None:
             print("[Error] End node is not found in Node Material: %s" % self.material.GetName())
             return None
@@ -538,6 +715,28 @@ class RedshiftNodeMaterial:
             raise ValueError("Cannot retrieve the inputs list of the bsdfNode node")
         #print(rootshader)
         return rootshader    
+
+    # [private]
+    def _VerifyCached(self, what, cached, fresh):
+        """
+        Private function comparing a memoized node with a fresh lookup (debug mode), returns the fresh one.
+        """
+        if (cached is None) != (fresh is None) or (fresh is not None and str(cached.GetPath()) != str(fresh.GetPath())):
+            print("[WARNING] Cached %s of Node Material %s is stale: %r != %r" % (what, self.material.GetName(), cached, fresh))
+        return fresh
+
+    # [private]
+    def _InvalidateRoot(self, shader=None, inPort=None):
+        """
+        Private function resetting the memoized output node / root BRDF.
+        Called by the mutating calls of this class: any RemoveShader, and connections made to or removed from an output node port.
+        Port objects (instead of id strings) are only recognised on the memoized output node itself.
+        """
+        if inPort is not None and shader is not self._rsOutput and not (isinstance(inPort, str) and inPort.startswith(OutputPortPrefix)):
+            return
+        self._rootBRDF = None
+        if inPort is None:
+            self._rsOutput = None
     
     def GetInputPortNames(self, shader, display=False):
         """
@@ -592,6 +791,7 @@ class RedshiftNodeMaterial:
         """
         if shader is None:
             return None
+        profiling.Count("SetShaderName")
         shadername = maxon.String(name)   
         shader.SetValue(maxon.NODE.BASE.NAME, shadername)
         shader.SetValue(maxon.EffectiveName, shadername)
@@ -612,11 +812,12 @@ class RedshiftNodeMaterial:
         if shader is None or paramId is None:
             return None
         # standard data type
-        port = shader.GetInputs().FindChild(paramId)
+        port = self._FindPort(shader, paramId)
         if not self.IsPortValid(port):
             print("[WARNING] Input port '%s' is not found on shader '%r'" % (paramId, shader))
             return None
     
+        profiling.Count("SetShaderValue")
         port.SetDefaultValue(value)
 
 # =====  Modify  ===== #  
@@ -625,24 +826,56 @@ class RedshiftNodeMaterial:
     # 创建shader list
     def _CollectShaders(self, node, shaders):
         """
-        Private function to collect shaders from the graph.
+        Private function to collect shaders from the graph, walking into node groups.
 
         Parameters
         ----------
         node : maxon.frameworks.graph.GraphNode
             Graph node.
         shaders : list
-            List of shaders.
+            List of (asset id, shader) tuples.
         """
         if node.GetKind() != maxon.frameworks.graph.NODE_KIND.NODE:
             return
 
-        if self.GetAssetId(node) == "net.maxon.node.group":
-            for node in root.GetChildren():
-                self._CollectShaders(node, shaders)
+        assetId = self._ReadAssetId(node)
+        if assetId == GROUP_ASSET_ID:
+            for child in node.GetChildren():
+                self._CollectShaders(child, shaders)
             return
 
-        shaders.append(node)
+        shaders.append((assetId, node))
+
+    # [private]
+    def _IndexShaders(self):
+        """
+        Private function returning the shader index, built with one walk of the graph the first time.
+        Kept up to date by _AddNode and RemoveShader, edits made around this class need a new RedshiftNodeMaterial.
+        """
+        if self._shaderIndex is None or VERIFY_SHADER_INDEX:
+            shaders = []
+            if self.graph is not None:
+                for node in self.graph.GetRoot().GetChildren():
+                    self._CollectShaders(node, shaders)
+            if self._shaderIndex is not None:
+                fresh = [str(node.GetPath()) for _, node in shaders]
+                if fresh != list(self._shaderIndex):
+                    print("[WARNING] Shader index of Node Material %s is stale: %r != %r" % (self.material.GetName(), list(self._shaderIndex), fresh))
+            profiling.Count("IndexShaders")
+            self._shaderIndex = {}
+            self._shadersByAsset = {}
+            for assetId, node in shaders:
+                self._IndexShader(assetId, node)
+        return self._shaderIndex
+
+    # [private]
+    def _IndexShader(self, assetId, shader):
+        """
+        Private function adding a shader to the shader index.
+        """
+        key = str(shader.GetPath())
+        self._shaderIndex[key] = (assetId, shader)
+        self._shadersByAsset.setdefault(assetId, {})[key] = shader
     # 遍历shader ==> OK 
     def GetShaders(self,display=False):
         """
@@ -655,14 +888,40 @@ class RedshiftNodeMaterial:
         if self.graph is None:
             return []
 
-        shaders = []
-
-        root = self.graph.GetRoot()
-        for node in root.GetChildren():   
-            self._CollectShaders(node, shaders) 
+        shaders = [shader for _, shader in self._IndexShaders().values()]
         if display == True:
             print("Shaders Num : " + str(len(shaders)-2))
         return shaders
+    # 按类型获取shader
+    def GetShadersByType(self, shaderId):
+        """
+        Returns the shaders of one type in graph order, from the shader index.
+
+        Parameters
+        ----------
+        shaderId : str
+            The Redshift node entry name (e.g. "texturesampler") or a full asset id.
+        """
+        if self.graph is None:
+            return []
+
+        self._IndexShaders()
+        assetId = str(shaderId)
+        if "." not in assetId:
+            assetId = RS_SHADER_PREFIX + assetId
+        return list(self._shadersByAsset.get(assetId, {}).values())
+    # 获取第一个该类型的shader
+    def FindFirstShader(self, shaderId):
+        """
+        Returns the first shader of one type, None if the graph has none.
+
+        Parameters
+        ----------
+        shaderId : str
+            The Redshift node entry name (e.g. "texturesampler") or a full asset id.
+        """
+        shaders = self.GetShadersByType(shaderId)
+        return shaders[0] if shaders else None
     # 删除Shader ==> OK 
     def RemoveShader(self, shader):
         """
@@ -679,6 +938,26 @@ class RedshiftNodeMaterial:
         if shader is None:
             return
 
+        profiling.Count("RemoveShader")
+        # Handles of the removed node may be cached under any wrapper of it
+        self._portCache.clear()
+        self._InvalidateRoot(shader)
+        if self._shaderIndex is not None:
+            key = str(shader.GetPath())
+            entry = self._shaderIndex.pop(key, None)
+            if entry is None:
+                # A group or a node the index doesn't know, walk the graph again on the next query
+                self._shaderIndex = None
+                self._shadersByAsset = None
+                self._incoming = None
+                self._outgoing = None
+            else:
+                self._shadersByAsset[entry[0]].pop(key, None)
+        if self._incoming is not None:
+            for index in (self._incoming, self._outgoing):
+                for connections in list(index.get(str(shader.GetPath()), {}).values()):
+                    for connection in connections:
+                        self._UnindexConnection(connection)
         shader.Remove()
     # todo 隐藏节点预览 ==> TO DO
     # todo 暴露接口 ==> TO DO
@@ -698,18 +977,183 @@ class RedshiftNodeMaterial:
         if self.graph is None:
             return []
 
+        incoming = self._IndexConnections()
         connections = []
+        for key in self._IndexShaders():
+            for portConnections in incoming.get(key, {}).values():
+                connections.extend(portConnections)
 
-        for shader in self.GetShaders():
-            for inPort in shader.GetInputs().GetChildren():
-                for c in inPort.GetConnections(maxon.frameworks.misc.PORT_DIR.INPUT):
-                    outPort = c[0]
-                    src = outPort.GetAncestor(maxon.frameworks.graph.NODE_KIND.NODE)
-                    connections.append((src, outPort, shader, inPort))
+        return connections
+
+    # [private]
+    def _IndexConnections(self):
+        """
+        Private function returning the incoming side of the adjacency index, built from the input ports of every shader the first time.
+        Kept up to date by AddConnection, RemoveConnection and RemoveShader.
+        """
+        if self._incoming is None:
+            profiling.Count("IndexConnections")
+            self._incoming = {}
+            self._outgoing = {}
+            for shader in self.GetShaders():
+                for inPort in shader.GetInputs().GetChildren():
+                    for c in inPort.GetConnections(maxon.frameworks.misc.PORT_DIR.INPUT):
+                        outPort = c[0]
+                        src = outPort.GetAncestor(maxon.frameworks.graph.NODE_KIND.NODE)
+                        self._IndexConnection((src, outPort, shader, inPort))
+        return self._incoming
+
+    # [private]
+    def _IndexConnection(self, connection):
+        """
+        Private function adding a (source, output port, target, input port) connection to the adjacency index.
+        """
+        src, outPort, target, inPort = connection
+        self._incoming.setdefault(str(target.GetPath()), {}).setdefault(str(inPort.GetId()), []).append(connection)
+        self._outgoing.setdefault(str(src.GetPath()), {}).setdefault(str(outPort.GetId()), []).append(connection)
+
+    # [private]
+    def _UnindexConnection(self, connection):
+        """
+        Private function removing a connection from both sides of the adjacency index.
+        """
+        src, outPort, target, inPort = connection
+        for index, key, portId in ((self._incoming, str(target.GetPath()), str(inPort.GetId())), (self._outgoing, str(src.GetPath()), str(outPort.GetId()))):
+            ports = index.get(key, {})
+            if portId not in ports:
+                continue
+            ports[portId] = [other for other in ports[portId] if other is not connection]
+            if not ports[portId]:
+                del ports[portId]
+            if not ports:
+                del index[key]
+
+    # [private]
+    def _PortKey(self, shader, port):
+        """
+        Private function returning the id a port has in the adjacency index.
+        Takes a port, its full id or its name on the shader (e.g. "base_color").
+        """
+        if not isinstance(port, str):
+            return str(port.GetId())
+        if "." in port:
+            return port
+        return self.GetAssetId(shader) + "." + port
+    # 获取当前node连接线
+    def GetNodeConnections(self, shader, output=False):
+        """
+        Returns the connections into the given shader, or out of it, from the adjacency index.
+        Same tuples as GetConnections.
+
+        Parameters
+        ----------
+        shader : maxon.frameworks.graph.GraphNode
+            The shader node.
+        output : bool
+            True : connections leaving the shader's output ports
+            False: connections arriving at its input ports
+        """
+        if self.graph is None or shader is None:
+            return []
 
+        self._IndexConnections()
+        index = self._outgoing if output else self._incoming
+        connections = []
+        for portConnections in index.get(str(shader.GetPath()), {}).values():
+            connections.extend(portConnections)
         return connections
-    # todo 获取当前node连接线 
-    # todo 获取当前port连接线 
+    # 获取当前port连接线
+    def GetPortConnections(self, shader, port, output=False):
+        """
+        Returns the connections of one port of the given shader, from the adjacency index.
+
+        Parameters
+        ----------
+        shader : maxon.frameworks.graph.GraphNode
+            The shader node.
+        port : str or port
+            The port, its full id or its name (e.g. "base_color").
+        output : bool
+            True if port is an output port.
+        """
+        if self.graph is None or shader is None or port is None:
+            return []
+
+        self._IndexConnections()
+        index = self._outgoing if output else self._incoming
+        return list(index.get(str(shader.GetPath()), {}).get(self._PortKey(shader, port), ()))
+    # 获取上游节点
+    def GetPredecessors(self, shader, inPort=None):
+        """
+        Returns the shaders directly connected to the inputs of the given shader, or to one of its inputs.
+
+        Parameters
+        ----------
+        shader : maxon.frameworks.graph.GraphNode
+            The shader node.
+        inPort : str or port
+            Only this input port, e.g. "base_color" for what feeds the base color.
+        """
+        connections = self.GetNodeConnections(shader) if inPort is None else self.GetPortConnections(shader, inPort)
+        return self._UniqueShaders(connection[0] for connection in connections)
+    # 获取下游节点
+    def GetSuccessors(self, shader, outPort=None):
+        """
+        Returns the shaders directly driven by the outputs of the given shader, or by one of its outputs.
+
+        Parameters
+        ----------
+        shader : maxon.frameworks.graph.GraphNode
+            The shader node.
+        outPort : str or port
+            Only this output port.
+        """
+        connections = self.GetNodeConnections(shader, output=True) if outPort is None else self.GetPortConnections(shader, outPort, output=True)
+        return self._UniqueShaders(connection[2] for connection in connections)
+    # 获取上游子图
+    def GetUpstream(self, shader, inPort=None):
+        """
+        Returns every shader the given shader (or one of its inputs) depends on, nearest first.
+        """
+        return self._Traverse(self.GetPredecessors(shader, inPort), self.GetPredecessors, shader)
+    # 获取下游子图
+    def GetDownstream(self, shader, outPort=None):
+        """
+        Returns every shader the given shader (or one of its outputs) drives, nearest first.
+        """
+        return self._Traverse(self.GetSuccessors(shader, outPort), self.GetSuccessors, shader)
+
+    # [private]
+    def _UniqueShaders(self, shaders):
+        """
+        Private function dropping repeated shaders, keeping the first of each.
+        """
+        seen = set()
+        unique = []
+        for shader in shaders:
+            key = str(shader.GetPath())
+            if key not in seen:
+                seen.add(key)
+                unique.append(shader)
+        return unique
+
+    # [private]
+    def _Traverse(self, start, neighbours, origin):
+        """
+        Private function walking the adjacency index breadth first from start, origin left out.
+        """
+        seen = set([str(origin.GetPath())]) if origin is not None else set()
+        found = []
+        queue = deque(start)
+        while queue:
+            shader = queue.popleft()
+            key = str(shader.GetPath())
+            if key in seen:
+                continue
+            seen.add(key)
+            found.append(shader)
+            queue.extend(neighbours(shader))
+        return found
     # 添加连接线 ==> OK 
     def AddConnection(self, soure_node, outPort, target_node, inPort, removeExisting=True):
         """
@@ -734,17 +1178,18 @@ class RedshiftNodeMaterial:
 
         if outPort is None or outPort == "":
             outPort = "output"
+        inPortId = inPort
 
         if isinstance(outPort, str):
             outPort_name = outPort
-            outPort = soure_node.GetOutputs().FindChild(outPort_name)
+            outPort = self._FindPort(soure_node, outPort_name, output=True)
             if not self.IsPortValid(outPort):
                 print("[WARNING] Output port '%s' is not found on shader '%r'" % (outPort_name, soure_node))
                 outPort = None
 
         if isinstance(inPort, str):
             inPort_name = inPort
-            inPort = target_node.GetInputs().FindChild(inPort_name)
+            inPort = self._FindPort(target_node, inPort_name)
             if not self.IsPortValid(inPort):
                 print("[WARNING] Input port '%s' is not found on shader '%r'" % (inPort_name, target_node))
                 inPort = None
@@ -754,8 +1199,13 @@ class RedshiftNodeMaterial:
 
         if removeExisting:
             self.RemoveConnection(target_node, inPort)
+        self._InvalidateRoot(target_node, inPortId)
+        profiling.Count("Connect")
         outPort.Connect(inPort)
-        return (soure_node, outPort, target_node, inPort)
+        connection = (soure_node, outPort, target_node, inPort)
+        if self._incoming is not None:
+            self._IndexConnection(connection)
+        return connection
     # 删除连接线
     def RemoveConnection(self, target_node, inPort):
         """
@@ -774,9 +1224,10 @@ class RedshiftNodeMaterial:
         if target_node is None:
             return None
 
+        inPortId = inPort
         if isinstance(inPort, str):
             inPort_name = inPort
-            inPort = target_node.GetInputs().FindChild(inPort_name)
+            inPort = self._FindPort(target_node, inPort_name)
             if not self.IsPortValid(inPort):
                 print("[Error] Input port '%s' is not found on shader '%r'" % (inPort_name, target_node))
                 inPort = None
@@ -784,8 +1235,13 @@ class RedshiftNodeMaterial:
         if inPort is None:
             return None
 
+        self._InvalidateRoot(target_node, inPortId)
+        profiling.Count("RemoveConnections")
         mask = maxon.frameworks.graph.Wires(maxon.frameworks.graph.WIRE_MODE.NORMAL)
         inPort.RemoveConnections(maxon.frameworks.misc.PORT_DIR.INPUT, mask)    
+        if self._incoming is not None:
+            for connection in list(self._incoming.get(str(target_node.GetPath()), {}).get(str(inPort.GetId()), ())):
+                self._UnindexConnection(connection)
     # todo 禁用连接线    
     # 连接到Output Surface接口
     def AddtoOutput(self, soure_node, outPort):
@@ -832,13 +1288,26 @@ class RedshiftNodeMaterial:
     
     def ArrangeNodes(self):
         """
-        Arranges the nodes in the graph.
+        Arranges the nodes in the graph with the layered layout of node_layout.
+        Works on this material's graph directly (not the one open in the node editor), call it inside a transaction.
         """
         if self.graph is None:
             return
 
-        # Can be derived from Extensions -> Script log
-        c4d.CallCommand(465002363) # Arrange All Nodes
+        profiling.Count("ArrangeNodes")
+        shaders = self.GetShaders()
+        keys = [str(shader.GetPath()) for shader in shaders]
+        edges = [(str(src.GetPath()), str(target.GetPath())) for src, outPort, target, inPort in self.GetConnections()]
+        sizes = {}
+        for key, shader in zip(keys, shaders):
+            size = LAYOUT_NODE_SIZES.get(self.GetShaderId(shader))
+            if size is not None:
+                sizes[key] = size
+
+        positions = node_layout.Layout(keys, edges, sizes)
+        for key, shader in zip(keys, shaders):
+            x, y = positions[key]
+            shader.SetValue(NODE_POSITION_ATTRIBUTE, maxon.Vector(x, y, 0))
 
 #=============================================
 #           Redshift Transaction
@@ -857,12 +1326,132 @@ class RSMaterialTransaction:
 
     def __enter__(self):
         if self.redshiftMaterial is not None and self.redshiftMaterial.graph is not None:
+            profiling.Count("BeginTransaction")
             self.transaction = self.redshiftMaterial.graph.BeginTransaction()
         return self
 
     def __exit__(self, type, value, traceback):
         if self.transaction is not None:
-            self.transaction.Commit()
+            profiling.Count("Commit")
+            with profiling.Phase("commit"):
+                self.transaction.Commit()
+
+# Batch Transaction
+DEFAULT_COMMIT_WINDOW = 64
+
+# How a graph transaction is recorded for undo (maxon.nodes.UndoMode)
+GRAPH_UNDO_DEFAULT = None   # BeginTransaction without user data
+GRAPH_UNDO_ADD = "ADD"      # joins the document's open undo step
+GRAPH_UNDO_NONE = "NONE"    # not recorded at all
+
+def TransactionUserData(graph_undo):
+    """
+    User data for BeginTransaction that sets how the transaction is recorded for undo, None for the default.
+    """
+    if graph_undo is None:
+        return None
+    nodes = getattr(maxon, "nodes", None)
+    if nodes is None or not hasattr(nodes, "UndoMode"):
+        return None # API without undo modes, transactions are recorded the default way
+    data = maxon.DataDictionary()
+    data.Set(nodes.UndoMode, getattr(nodes.UNDO_MODE, graph_undo))
+    return data
+
+class RSBatchTransaction:
+    """
+    Groups the transactions of many Redshift Node Materials into commit windows.
+    Use it in a `with` statement and `Add` every material before editing it.
+
+    A graph transaction can't span graphs and every material has its own, so a
+    window still begins and commits one transaction per material: the commits
+    are grouped in time, not merged, and each one costs what it did before.
+    What a window saves is the separate layout transaction: with `arrange` every
+    material is laid out once, right before its window commits, inside its open
+    transaction. A material added again while its transaction is open reuses it.
+    `graph_undo` is one of the GRAPH_UNDO_ modes and applies to every transaction.
+    """
+
+    def __init__(self, window_size=DEFAULT_COMMIT_WINDOW, arrange=False, graph_undo=GRAPH_UNDO_DEFAULT):
+        self.window_size = max(1, int(window_size))
+        self.arrange = arrange
+        self.user_data = TransactionUserData(graph_undo)
+        self.open = []
+        self.touched = []
+        self.commits = 0
+        self.windows = 0
+        self.commit_time = 0.0
+
+    def Add(self, redshiftMaterial, arrange=True):
+        """
+        Opens the transaction of the given material, committing the current window first if it is full.
+        Pass arrange=False for materials that are already laid out (e.g. copies of an arranged one).
+        """
+        if redshiftMaterial is not None:
+            for other, _, _ in self.open:
+                if other is redshiftMaterial or (other is not None and other.material == redshiftMaterial.material):
+                    return redshiftMaterial
+        if len(self.open) >= self.window_size:
+            self.Commit()
+        transaction = None
+        if redshiftMaterial is not None and redshiftMaterial.graph is not None:
+            profiling.Count("BeginTransaction")
+            if self.user_data is None:
+                transaction = redshiftMaterial.graph.BeginTransaction()
+            else:
+                transaction = redshiftMaterial.graph.BeginTransaction(self.user_data)
+        self.open.append((redshiftMaterial, transaction, arrange))
+        self.touched.append(redshiftMaterial)
+        return redshiftMaterial
+
+    def Commit(self):
+        """
+        Commits every open transaction of the current window.
+        """
+        if not self.open:
+            return
+        self._CommitEntries(self.open)
+        self.windows += 1
+        self.open = []
+
+    def CommitMaterial(self, redshiftMaterial):
+        """
+        Commits only the transaction of the given material and leaves the rest of the window open,
+        e.g. to read back one finished graph in the middle of a window.
+        """
+        entries = [entry for entry in self.open if entry[0] is redshiftMaterial]
+        if not entries:
+            return
+        self._CommitEntries(entries)
+        self.windows += 1
+        self.open = [entry for entry in self.open if entry[0] is not redshiftMaterial]
+
+    def _CommitEntries(self, entries):
+        if self.arrange:
+            # Layout is deferred until the window commits, so it runs once per material on the final graph
+            with profiling.Phase("arrange", per_material=False):
+                for redshiftMaterial, transaction, arrange in entries:
+                    if transaction is not None and arrange:
+                        redshiftMaterial.ArrangeNodes()
+        start = time.perf_counter()
+        with profiling.Phase("commit", per_material=False):
+            for redshiftMaterial, transaction, arrange in entries:
+                if transaction is not None:
+                    profiling.Count("Commit", per_material=False)
+                    transaction.Commit()
+                    self.commits += 1
+        self.commit_time += time.perf_counter() - start
+
+    def Report(self):
+        """
+        Returns a one line summary of the commit timing.
+        """
+        return "%d materials, %d commits in %d windows, %.3fs committing" % (len(self.touched), self.commits, self.windows, self.commit_time)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.Commit()
 
 
 
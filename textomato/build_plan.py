@@ -0,0 +1,395 @@
+#  Declarative material build plans
+#
+#  Turns a texture set and the import options into an immutable BuildPlan:
+#  the nodes to create, the port values to set and the wires to draw.
+#  Planning never touches the node graph, so plans can be checked, compared
+#  and timed headless; executeBuildPlan in TexToMatO.pyp applies them
+#  through RedshiftNodeMaterial.
+#
+#  Header facts from textomato.image_probe, when given, pick the bump input
+#  type and check that a multiTex base texture actually has RGB channels.
+#
+#  Ports are (shader, port) pairs of short ids, e.g. ("texturesampler", "outcolor"),
+#  the executor turns them into full port ids. Vector values are 3-tuples.
+#
+#  Texture sets that only differ in their files get the same graph, so the
+#  plan is built once per shape (options, channels and the header facts that
+#  matter) with placeholder paths and then only filled in with each set's
+#  files; planning a library costs little more than its texture loop.
+#
+#  Pure Python, no c4d / maxon imports.
+#
+from collections import namedtuple
+
+from .image_probe import IsGrayscale
+
+ROOT = "root"       # key of the material's existing Standard Surface node
+OUTPUT = "output"   # key of the material's existing output node
+
+COLORSPACE_AUTO = ""
+COLORSPACE_RAW = "RS_INPUT_COLORSPACE_RAW"
+
+# texture is None or (filepath, colorspace) for texture samplers and sprites
+NodeSpec = namedtuple("NodeSpec", ["key", "shader", "name", "texture"])
+Edge = namedtuple("Edge", ["source", "source_port", "target", "target_port"])
+# One entry per imported texture, index is the position in tex_tuples
+TextureSlot = namedtuple("TextureSlot", ["index", "key", "filepath", "connected"])
+BuildPlan = namedtuple("BuildPlan", ["nodes", "values", "edges", "textures", "skipped", "multitex_missing", "notes"])
+
+BUMP_HEIGHT_FIELD = 0
+BUMP_TANGENT_NORMAL = 1
+
+SHAPE_CACHE_SIZE = 4096 # plan shapes kept, the cache is emptied when it is full
+
+_ROOT_SHADER = "standardmaterial"
+_OUTPUT_SURFACE = ("output", "surface")
+_OUTPUT_DISPLACEMENT = ("output", "displacement")
+
+class _PlanBuilder:
+    """
+    Mutable draft of a plan, frozen into a BuildPlan by Freeze.
+    """
+
+    def __init__(self):
+        self.nodes = []
+        self.shaders = {ROOT: _ROOT_SHADER}
+        self.values = {}
+        self.edges = {}
+        self.counts = {}
+
+    def Node(self, shader, name=None, texture=None):
+        count = self.counts.get(shader, 0)
+        self.counts[shader] = count + 1
+        key = "%s%d" % (shader, count)
+        self.nodes.append(NodeSpec(key, shader, name, texture))
+        self.shaders[key] = shader
+        return key
+
+    def Value(self, key, port, value):
+        # Later values replace earlier ones, the executor only sets the final value
+        self.values[(key, port)] = value
+
+    def Connect(self, source, source_port, target, target_port):
+        # AddConnection replaces the wire already on an input, so only the last one per input is kept
+        self.edges.pop((target, target_port), None)
+        self.edges[(target, target_port)] = Edge(source, source_port, target, target_port)
+
+    def Freeze(self, textures, skipped, multitex_missing, notes):
+        return BuildPlan(
+            tuple(self.nodes),
+            tuple((key, port, value) for (key, port), value in self.values.items()),
+            tuple(self.edges.values()),
+            tuple(textures),
+            tuple(skipped),
+            multitex_missing,
+            tuple(notes),
+        )
+
+def _Sample(builder, texture, connect, material_arguments, transforms, channel_name):
+    """
+    Wires a texture sampler through the optional triplanar and transform nodes into `connect`.
+    Returns the node whose output carries the texture (the triplanar node if there is one).
+    """
+    shader = "texturesampler"
+    rotation_shader = "rsmathabs"
+    rotation_port = "rotate"
+    if material_arguments["addTriplanar"]:
+        triplanar = builder.Node("triplanar", channel_name + " TRIPL")
+        builder.Connect(texture, ("texturesampler", "outcolor"), triplanar, ("triplanar", "imagex"))
+        shader = "triplanar"
+        rotation_shader = "rsmathabsvector"
+        rotation_port = "rotation"
+        texture = triplanar
+
+    if transforms is not None:
+        scale, translate, rotate = transforms
+        builder.Connect(scale, ("rsmathabsvector", "out"), texture, (shader, "scale"))
+        builder.Connect(translate, ("rsmathabsvector", "out"), texture, (shader, "offset"))
+        builder.Connect(rotate, (rotation_shader, "out"), texture, (shader, rotation_port))
+
+    builder.Connect(texture, (shader, "outcolor"), *connect)
+    return texture
+
+def _LowBitDepth(info):
+    return info is not None and info.bit_depth is not None and info.bit_depth <= 8 and not info.is_float
+
+def _Placeholder(index):
+    # Stands in for the path of texture `index` while a shape is planned, contains no path separator
+    return "\0%d\0" % index
+
+def _OptionsKey(material_arguments):
+    multi_tex = material_arguments["multiTex"]
+    return (
+        material_arguments["addCC"], material_arguments["addTriplanar"], material_arguments["addScaleRotOff"],
+        material_arguments["aoOverallTint"], material_arguments["bumpFlipY"], material_arguments["bumpLegacy"],
+        material_arguments["spriteOpacity"], multi_tex["BASE"], multi_tex["R"], multi_tex["G"], multi_tex["B"],
+    )
+
+# Stand-in ImageInfo for shapes, the planner only reads channels, bit depth and float-ness
+_ShapeInfo = namedtuple("_ShapeInfo", ["channels", "bit_depth", "is_float"])
+
+_shape_cache = {}
+
+def _PlanShape(key, channels, classifier, material_arguments):
+    """
+    Plans a shape with placeholder paths and notes where each set's files go.
+    """
+    placeholders = [_Placeholder(index) for index in range(len(channels))]
+    image_infos = {}
+    for placeholder, (_, _, grayscale, low_bit_depth) in zip(placeholders, channels):
+        if grayscale or low_bit_depth:
+            image_infos[placeholder] = _ShapeInfo(1 if grayscale else 3, 8 if low_bit_depth else 16, False)
+    plan = _PlanMaterial([(channel[0], placeholder) for channel, placeholder in zip(channels, placeholders)], classifier, material_arguments, image_infos)
+    indices = {placeholder: index for index, placeholder in enumerate(placeholders)}
+    node_slots = tuple((position, indices[node.texture[0]], node.name is not None) for position, node in enumerate(plan.nodes) if node.texture is not None)
+    notes = tuple((note, tuple(index for placeholder, index in indices.items() if placeholder in note)) for note in plan.notes)
+    skipped = tuple(indices[placeholder] for placeholder in plan.skipped)
+    if len(_shape_cache) >= SHAPE_CACHE_SIZE:
+        _shape_cache.clear()
+    shape = _shape_cache[key] = (plan, node_slots, notes, skipped)
+    return shape
+
+def PlanMaterial(tex_tuples, classifier, material_arguments, image_infos=None):
+    """
+    Plans the node graph importTexturesToMaterial builds for a texture set.
+
+    Parameters
+    ----------
+    tex_tuples : list
+        (channel_name, filepath) pairs of the texture set.
+    classifier : textomato.channels.ChannelClassifier
+        Resolves channel names to channel types.
+    material_arguments : dict
+        The import options (addCC, addTriplanar, addScaleRotOff, aoOverallTint,
+        bumpFlipY, bumpLegacy, spriteOpacity, multiTex).
+    image_infos : dict
+        filepath -> ImageInfo from textomato.image_probe. Files without an
+        entry are planned as if they were RGB.
+
+    Returns
+    -------
+    BuildPlan
+        Immutable and hashable, equal texture sets and options give equal plans.
+    """
+    image_infos = image_infos or {}
+    multi_tex = material_arguments["multiTex"]["BASE"] != " "
+    channels = []
+    for channel_name, filepath in tex_tuples:
+        # Only the header facts the planner reads for this channel go into the key
+        channel_type = classifier.ChannelType(channel_name)
+        info = image_infos.get(filepath)
+        grayscale = (multi_tex or channel_type == "normal_channel") and IsGrayscale(info)
+        low_bit_depth = channel_type == "displacement_channel" and _LowBitDepth(info)
+        channels.append((channel_name, channel_type, grayscale, low_bit_depth))
+    key = (_OptionsKey(material_arguments), tuple(channels))
+    shape = _shape_cache.get(key)
+    if shape is None:
+        shape = _PlanShape(key, channels, classifier, material_arguments)
+    plan, node_slots, notes, skipped = shape
+
+    filepaths = [filepath for _, filepath in tex_tuples]
+    nodes = list(plan.nodes)
+    for position, index, named in node_slots:
+        node = nodes[position]
+        filepath = filepaths[index]
+        name = filepath.replace("\\", "/").rsplit("/", 1)[-1] if named else None
+        nodes[position] = NodeSpec(node.key, node.shader, name, (filepath, node.texture[1]))
+    filled_notes = []
+    for note, indices in notes:
+        for index in indices:
+            note = note.replace(_Placeholder(index), filepaths[index].replace("\\", "/").rsplit("/", 1)[-1])
+        filled_notes.append(note)
+    return BuildPlan(
+        tuple(nodes),
+        plan.values,
+        plan.edges,
+        tuple(TextureSlot(slot.index, slot.key, filepaths[slot.index], slot.connected) for slot in plan.textures),
+        tuple(filepaths[index] for index in skipped),
+        plan.multitex_missing,
+        tuple(filled_notes),
+    )
+
+def _PlanMaterial(tex_tuples, classifier, material_arguments, image_infos):
+    """
+    Builds a plan node by node, PlanMaterial runs it once per shape.
+    """
+    builder = _PlanBuilder()
+    textures = []
+    skipped = []
+    notes = []
+    mat_tex_files = {}
+
+    albedo_connectport = (ROOT, (_ROOT_SHADER, "base_color"))
+    ao_connectport = (ROOT, (_ROOT_SHADER, "overall_color"))
+    color_layer = None
+    if not material_arguments["aoOverallTint"]:
+        color_layer = builder.Node("rscolorlayer")
+        builder.Value(color_layer, ("rscolorlayer", "layer1_enable"), False)
+        builder.Value(color_layer, ("rscolorlayer", "layer1_blend_mode"), 4) # Multiply
+        builder.Connect(color_layer, ("rscolorlayer", "outcolor"), *albedo_connectport)
+        albedo_connectport = (color_layer, ("rscolorlayer", "base_color"))
+        ao_connectport = (color_layer, ("rscolorlayer", "layer1_color"))
+
+    transforms = None
+    if material_arguments["addScaleRotOff"]:
+        translate = builder.Node("rsmathabsvector", "OFFSET")
+        scale = builder.Node("rsmathabsvector", "SCALE")
+        if material_arguments["addTriplanar"]:
+            builder.Value(scale, ("rsmathabsvector", "input"), (.01, .01, .01))
+            rotate = builder.Node("rsmathabsvector", "ROTATE")
+        else:
+            builder.Value(scale, ("rsmathabsvector", "input"), (1.0, 1.0, 1.0))
+            rotate = builder.Node("rsmathabs", "ROTATE")
+        transforms = (scale, translate, rotate)
+
+    mat_tex_dict = {
+        "Roughness": None,
+        "Roughness_Ramp": None,
+        "Glossiness": None,
+        "Specular": None,
+        "AO": None,
+        "Metalness": None,
+        "Opacity": None,
+    }
+    sampleArgs = (material_arguments, transforms)
+
+    for tex_index, (channel_name, filepath) in enumerate(tex_tuples):
+        filename = filepath.replace("\\", "/").rsplit("/", 1)[-1]
+        channel_type = classifier.ChannelType(channel_name)
+        connected = True
+
+        if channel_type == "color_channel":
+            tex_node = builder.Node("texturesampler", filename, (filepath, COLORSPACE_AUTO))
+            if material_arguments["addCC"]:
+                albedo_cc = builder.Node("rscolorcorrection", "ALBEDO CC")
+                builder.Connect(albedo_cc, ("rscolorcorrection", "outcolor"), *albedo_connectport)
+                albedo_connectport = (albedo_cc, ("rscolorcorrection", "input"))
+            _Sample(builder, tex_node, albedo_connectport, *sampleArgs, channel_name)
+
+        elif channel_type == "roughness_channel" or channel_type == "glossiness_channel":
+            tex_node = builder.Node("texturesampler", filename, (filepath, COLORSPACE_RAW))
+            ramp_refl_roughness = builder.Node("rsscalarramp", "ROUGHNESS RAMP")
+            if channel_type == "glossiness_channel":
+                builder.Value(ramp_refl_roughness, ("rsscalarramp", "inputinvert"), True)
+            builder.Connect(ramp_refl_roughness, ("rsscalarramp", "out"), ROOT, (_ROOT_SHADER, "refl_roughness"))
+            mat_tex_dict["Roughness_Ramp"] = ramp_refl_roughness
+            mat_tex_dict["Roughness"] = _Sample(builder, tex_node, (ramp_refl_roughness, ("rsscalarramp", "input")), *sampleArgs, channel_name)
+            mat_tex_dict["Glossiness"] = mat_tex_dict["Roughness"]
+            mat_tex_files["Roughness"] = mat_tex_files["Glossiness"] = filepath
+
+        elif channel_type == "specular_channel":
+            tex_node = builder.Node("texturesampler", filename, (filepath, COLORSPACE_RAW))
+            mat_tex_dict["Specular"] = _Sample(builder, tex_node, (ROOT, (_ROOT_SHADER, "refl_color")), *sampleArgs, channel_name)
+            mat_tex_files["Specular"] = filepath
+
+        elif channel_type == "normal_channel":
+            tex_node = builder.Node("texturesampler", filename, (filepath, COLORSPACE_RAW))
+            bump_map = builder.Node("bumpmap")
+            builder.Connect(bump_map, ("bumpmap", "out"), ROOT, (_ROOT_SHADER, "bump_input"))
+            # A single channel "normal" map is a height map, bumped as a height field
+            bump_type = BUMP_HEIGHT_FIELD if IsGrayscale(image_infos.get(filepath)) else BUMP_TANGENT_NORMAL
+            builder.Value(bump_map, ("bumpmap", "inputtype"), bump_type)
+            builder.Value(bump_map, ("bumpmap", "flipy"), material_arguments["bumpFlipY"])
+            builder.Value(bump_map, ("bumpmap", "legacynormalmap"), material_arguments["bumpLegacy"])
+            _Sample(builder, tex_node, (bump_map, ("bumpmap", "input")), *sampleArgs, channel_name)
+
+        elif channel_type == "metalness_channel":
+            tex_node = builder.Node("texturesampler", filename, (filepath, COLORSPACE_RAW))
+            mat_tex_dict["Metalness"] = _Sample(builder, tex_node, (ROOT, (_ROOT_SHADER, "metalness")), *sampleArgs, channel_name)
+            mat_tex_files["Metalness"] = filepath
+
+        elif channel_type == "opacity_channel":
+            if material_arguments["spriteOpacity"]:
+                tex_node = builder.Node("sprite", None, (filepath, COLORSPACE_RAW)) # Sprites keep their default name
+                builder.Connect(tex_node, ("sprite", "outcolor"), OUTPUT, _OUTPUT_SURFACE)
+                builder.Connect(ROOT, (_ROOT_SHADER, "outcolor"), tex_node, ("sprite", "input"))
+            else:
+                tex_node = builder.Node("texturesampler", filename, (filepath, COLORSPACE_RAW))
+                mat_tex_dict["Opacity"] = _Sample(builder, tex_node, (ROOT, (_ROOT_SHADER, "opacity_color")), *sampleArgs, channel_name)
+                mat_tex_files["Opacity"] = filepath
+
+        elif channel_type == "ao_channel":
+            tex_node = builder.Node("texturesampler", filename, (filepath, COLORSPACE_RAW))
+            if color_layer is not None:
+                builder.Value(color_layer, ("rscolorlayer", "layer1_enable"), True)
+            mat_tex_dict["AO"] = _Sample(builder, tex_node, ao_connectport, *sampleArgs, channel_name)
+            mat_tex_files["AO"] = filepath
+
+        elif channel_type == "translucency_channel":
+            tex_node = builder.Node("texturesampler", filename, (filepath, COLORSPACE_AUTO))
+            translucency_connectport = (ROOT, (_ROOT_SHADER, "ms_color"))
+            if material_arguments["addCC"]:
+                translucency_cc = builder.Node("rscolorcorrection", "TRANSLUCENCC")
+                builder.Connect(translucency_cc, ("rscolorcorrection", "outcolor"), *translucency_connectport)
+                translucency_connectport = (translucency_cc, ("rscolorcorrection", "input"))
+            builder.Value(ROOT, (_ROOT_SHADER, "ms_amount"), 0.4)
+            builder.Value(ROOT, (_ROOT_SHADER, "refr_thin_walled"), True)
+            _Sample(builder, tex_node, translucency_connectport, *sampleArgs, channel_name)
+
+        elif channel_type == "displacement_channel":
+            tex_node = builder.Node("texturesampler", filename, (filepath, COLORSPACE_RAW))
+            displacement = builder.Node("displacement")
+            builder.Connect(displacement, ("displacement", "out"), OUTPUT, _OUTPUT_DISPLACEMENT)
+            _Sample(builder, tex_node, (displacement, ("displacement", "texmap")), *sampleArgs, channel_name)
+            if _LowBitDepth(image_infos.get(filepath)):
+                notes.append("Displacement map %s has 8 bit depth, expect stepping." % filename)
+
+        elif channel_type == "misc_channel":
+            tex_node = builder.Node("texturesampler", filename, (filepath, COLORSPACE_RAW))
+            connected = False
+
+        else:
+            skipped.append(filepath)
+            continue
+        textures.append(TextureSlot(tex_index, tex_node, filepath, connected))
+
+    multitex_missing = False
+    multi_tex = material_arguments["multiTex"]
+    if multi_tex["BASE"] != " ":
+        base_node = mat_tex_dict[multi_tex["BASE"]]
+        if not base_node:
+            multitex_missing = True
+        elif IsGrayscale(image_infos.get(mat_tex_files[multi_tex["BASE"]])):
+            # Nothing to split, the packed channels would all read the same values
+            base_file = mat_tex_files[multi_tex["BASE"]].replace("\\", "/").rsplit("/", 1)[-1]
+            notes.append("multiTex base texture %s has a single channel, not splitting it." % base_file)
+        else:
+            color_split_multi = builder.Node("rscolorsplitter")
+            builder.Connect(base_node, (builder.shaders[base_node], "outcolor"), color_split_multi, ("rscolorsplitter", "input"))
+
+            for rgb_channel in ["R", "G", "B"]:
+                multitex_channel = multi_tex[rgb_channel]
+                split_port = ("rscolorsplitter", "out" + rgb_channel.lower())
+                if multitex_channel == " ":
+                    pass
+                elif multitex_channel == "Roughness" or multitex_channel == "Glossiness":
+                    ramp_refl_roughness = mat_tex_dict["Roughness_Ramp"]
+                    if not ramp_refl_roughness:
+                        ramp_refl_roughness = builder.Node("rsscalarramp")
+                        if multitex_channel == "Glossiness":
+                            builder.Value(ramp_refl_roughness, ("rsscalarramp", "inputinvert"), True)
+                    builder.Connect(color_split_multi, split_port, ramp_refl_roughness, ("rsscalarramp", "input"))
+                    builder.Connect(ramp_refl_roughness, ("rsscalarramp", "out"), ROOT, (_ROOT_SHADER, "refl_roughness"))
+                elif multitex_channel == "Metalness":
+                    builder.Connect(color_split_multi, split_port, ROOT, (_ROOT_SHADER, "metalness"))
+                elif multitex_channel == "Specular":
+                    builder.Connect(color_split_multi, split_port, ROOT, (_ROOT_SHADER, "refl_color"))
+                elif multitex_channel == "AO":
+                    builder.Connect(color_split_multi, split_port, *ao_connectport)
+                    if color_layer is not None:
+                        builder.Value(color_layer, ("rscolorlayer", "layer1_enable"), True)
+                elif multitex_channel == "Opacity":
+                    builder.Connect(color_split_multi, split_port, ROOT, (_ROOT_SHADER, "opacity_color"))
+
+    return builder.Freeze(textures, skipped, multitex_missing, notes)
+
+def PlanStats(plan):
+    """
+    Graph operations the executor will issue for a plan.
+    """
+    return {
+        "nodes": len(plan.nodes),
+        "values": len(plan.values),
+        "edges": len(plan.edges),
+        "textures": len(plan.textures),
+    }
@@ -0,0 +1,271 @@
+#  Channel classification for texture filenames
+#
+#  Replaces the big alternation regex that was rebuilt on every import with
+#  a token trie that is compiled once per channel config into a factored
+#  pattern, so each position costs one trie walk instead of one attempt per token.
+#
+#  Pure Python, no c4d / maxon imports, so it can run outside Cinema 4D.
+#
+import hashlib
+import re
+from collections import namedtuple
+
+#=============================================
+#               Channel config
+#=============================================
+
+DEFAULT_CHANNELS = {
+    "image_extensions":         ["png", "jpeg", "jpg", "dds", "tga", "tif", "tiff", "bmp", "exr"],
+    "color_channel":            ["Base_Color", "BaseColor", "basecolor", "color", "COL", "Color", "Albedo", "albedo", "col", "Base", "diff", "_D-", "_D."],
+    "normal_channel":           ["Normal_OpenGL", "normal", "NRM", "Normal", "nml", "nrml", "Norm", "_N.", "_N("],
+    "ao_channel":               ["Mixed_AO", "ao", "AO"],
+    "metalness_channel":        ["Metallic", "Meta", "_M.", "_metal."],
+    "roughness_channel":        ["Roughness", "roughness", "Roug", "_R.", "_rough."],
+    "specular_channel":         ["Specular", "specular", "_S."],
+    "glossiness_channel":       ["GLOSS", "glossiness", "gloss"],
+    "opacity_channel":          ["opacity", "alpha", "opac", "_O.", "Opacity"],
+    "translucency_channel":     ["_L.", "_L_", "Translucency", "Transmission"],
+    "displacement_channel":     ["height", "DISP", "Displacement", "depth"],
+    "misc_channel":             ["soft-mask", "color-mask", "mix-mask", "tint-mask", "paint-mask", "mask", "_M(", "_MSK", "OVERLAY", "blend"]
+}
+
+# Order in which importTexturesToMaterial checks the channel lists.
+# A token listed in several channels resolves to the first one here.
+CHANNEL_TYPES = (
+    "color_channel",
+    "roughness_channel",
+    "glossiness_channel",
+    "specular_channel",
+    "normal_channel",
+    "metalness_channel",
+    "opacity_channel",
+    "ao_channel",
+    "translucency_channel",
+    "displacement_channel",
+    "misc_channel",
+)
+
+def BuildChannelsDict(custom_regex_dict=None, case_insensitive=False):
+    """
+    Returns the channel dict with the custom regex appended (and lowercased if case insensitive).
+    """
+    channels_dict = {key: list(value) for key, value in DEFAULT_CHANNELS.items()}
+    if custom_regex_dict:
+        for key, value in custom_regex_dict.items():
+            channels_dict[key] += value
+    if case_insensitive:
+        channels_dict = {key: [element.lower() for element in value] for key, value in channels_dict.items()}
+    return channels_dict
+
+#=============================================
+#               Resolution tokens
+#=============================================
+
+# _1K, -2k, .4K, _8K ... with no letter or digit directly around it
+RESOLUTION_TOKEN = re.compile(r"([-_. ]?)(?<![A-Za-z0-9])([1-9]|1[0-6])[kK](?![A-Za-z0-9])")
+
+def SplitResolution(text):
+    """
+    Finds a resolution token like _4K in a prefix or filename.
+
+    Returns
+    -------
+    (text, resolution)
+        The text without the token and its leading separator, and the
+        resolution in K, or the unchanged text and None if there is no token.
+    """
+    match = RESOLUTION_TOKEN.search(text)
+    if match is None:
+        return text, None
+    start = match.start()
+    if not match.group(1) and start == 0:
+        # Token at the start of the text, drop the separator that follows instead
+        end = match.end() + 1 if text[match.end():match.end() + 1] in ("-", "_", ".", " ") else match.end()
+        return text[end:], int(match.group(2))
+    return text[:start] + text[match.end():], int(match.group(2))
+
+#=============================================
+#               Tile tokens
+#=============================================
+
+# Path tokens Redshift expands into the tiles of a UDIM / UV tile set
+UDIM_TOKEN = "<UDIM>"           # Mari, 1001, 1002, ...
+UVTILE_TOKEN = "<UVTILE>"       # Mudbox, u1_v1, u2_v1, ...
+UVTILE_ZERO_TOKEN = "<uvtile>"  # ZBrush, u0_v0, u1_v0, ...
+TILE_TOKENS = (UDIM_TOKEN, UVTILE_TOKEN, UVTILE_ZERO_TOKEN)
+
+_UDIM_TILE = re.compile(r"(?<=[-_.])(1[0-9]{3})(?=[-_.]|$)")
+_UV_TILE = re.compile(r"(?<=[-_.])u([0-9]{1,2})_v([0-9]{1,2})(?=[-_.]|$)")
+_TILE_TOKEN = re.compile(r"[-_.]?(?:" + "|".join(re.escape(token) for token in TILE_TOKENS) + ")")
+
+def SplitTile(text):
+    """
+    Finds a UDIM (1001) or UV tile (u1_v1) number in a prefix or filename, the last one if there are several.
+
+    Returns
+    -------
+    (text, tile)
+        The text with the tile replaced by UDIM_TOKEN or UVTILE_TOKEN and the
+        tile, an int for UDIMs or a (u, v) tuple, or the unchanged text and None.
+    """
+    match = None
+    for match in _UV_TILE.finditer(text):
+        pass
+    if match is not None:
+        return text[:match.start()] + UVTILE_TOKEN + text[match.end():], (int(match.group(1)), int(match.group(2)))
+    for match in _UDIM_TILE.finditer(text):
+        pass
+    if match is not None:
+        return text[:match.start()] + UDIM_TOKEN + text[match.end():], int(match.group(1))
+    return text, None
+
+def StripTileToken(text):
+    """
+    Removes a tile token and its leading separator, for naming a material after a tiled prefix.
+    """
+    return _TILE_TOKEN.sub("", text)
+
+def HasTileToken(path):
+    return any(token in path for token in TILE_TOKENS)
+
+#=============================================
+#               Classifier
+#=============================================
+
+ChannelMatch = namedtuple("ChannelMatch", ["prefix", "channel", "channel_type", "extension"])
+
+_END = ""  # trie key marking the end of a token, never a real character
+
+def _TrieToPattern(node):
+    """
+    Emits a trie as a factored pattern, e.g. Base(?:_Color|Color)? for Base, Base_Color and BaseColor.
+    Siblings start with different characters and optional tails are greedy,
+    so the engine only walks one path per position and tries the longest token first.
+    """
+    branches = [re.escape(char) + _TrieToPattern(child) for char, child in sorted(node.items()) if char != _END]
+    if not branches:
+        return ""
+    pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if _END in node:
+        if len(branches) == 1:
+            pattern = "(?:" + pattern + ")"
+        pattern += "?"
+    return pattern
+
+class ChannelClassifier:
+    """
+    Compiled, immutable matcher for one channel config.
+
+    `Match` returns the prefix, channel token, channel type and extension of a
+    filename in a single pass with the same result as the old
+    ``^(.*?)(channels)(.*?)(?:extensions)\\b`` search: the earliest token
+    position wins, and at that position the longest token that is still
+    followed by an extension.
+    """
+    __slots__ = ("case_insensitive", "extensions", "pattern", "config_hash", "_types", "_frozen")
+
+    def __init__(self, channels_dict, case_insensitive=False):
+        self.case_insensitive = case_insensitive
+        self.extensions = tuple(self._Fold(ext) for ext in channels_dict["image_extensions"] if ext)
+        types = {}
+        for channel_type in CHANNEL_TYPES:
+            for token in channels_dict.get(channel_type, ()):
+                if token:
+                    types.setdefault(self._Fold(token), channel_type)
+        trie = {}
+        for token in types:
+            node = trie
+            for char in token:
+                node = node.setdefault(char, {})
+            node[_END] = True
+        flags = re.IGNORECASE if case_insensitive else 0
+        if trie and self.extensions:
+            extensions = "|".join(re.escape(ext) for ext in self.extensions)
+            self.pattern = re.compile("(" + _TrieToPattern(trie) + ")(?=.*?(" + extensions + ")\\b)", flags)
+        else:
+            self.pattern = None
+        # Stable across sessions, used to key persisted classification results
+        self.config_hash = hashlib.sha1(repr((case_insensitive, self.extensions, sorted(types.items()))).encode("utf-8")).hexdigest()[:16]
+        self._types = types
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError("ChannelClassifier is immutable")
+        object.__setattr__(self, name, value)
+
+    def _Fold(self, text):
+        return text.lower() if self.case_insensitive else text
+
+    def Fold(self, text):
+        """
+        Returns text the way this classifier compares it (lowercased if case insensitive).
+        """
+        return self._Fold(text)
+
+    def HasImageExtension(self, filename):
+        """
+        Same filter as filename.endswith(tuple(image_extensions)).
+        """
+        return filename.endswith(self.extensions)
+
+    def ChannelType(self, channel_name):
+        """
+        Returns the channel type key (e.g. "color_channel") of a matched token, or None.
+        """
+        return self._types.get(self._Fold(channel_name))
+
+    def Match(self, filename, prefix=None):
+        """
+        Classifies a filename.
+
+        Parameters
+        ----------
+        filename : str
+            The file's base name.
+        prefix : str
+            If given, the channel token has to start right after this prefix
+            (the anchored search import-from-base uses for sibling textures).
+
+        Returns
+        -------
+        ChannelMatch or None
+        """
+        if self.pattern is None:
+            return None
+        if prefix is None:
+            match = self.pattern.search(filename)
+        elif self._Fold(filename[:len(prefix)]) == self._Fold(prefix):
+            match = self.pattern.match(filename, len(prefix))
+        else:
+            return None
+        if match is None:
+            return None
+        channel = match.group(1)
+        return ChannelMatch(filename[:match.start()], channel, self._types[self._Fold(channel)], match.group(2))
+
+_classifier_cache = {}
+
+def GetClassifier(custom_regex_dict=None, case_insensitive=False):
+    """
+    Returns the compiled classifier for a config, building it only on the first request.
+    """
+    key = (case_insensitive, tuple(sorted((k, tuple(v)) for k, v in (custom_regex_dict or {}).items())))
+    classifier = _classifier_cache.get(key)
+    if classifier is None:
+        classifier = ChannelClassifier(BuildChannelsDict(custom_regex_dict, case_insensitive), case_insensitive)
+        _classifier_cache[key] = classifier
+    return classifier
+
+#=============================================
+#               Legacy regex
+#=============================================
+
+def BuildLegacyRegex(channels_dict):
+    """
+    The alternation pattern init_channels used to build, kept for benchmarking.
+    """
+    all_channels = [channel for channels in channels_dict.values() for channel in channels]
+    all_channels.sort(key=len, reverse=True)
+    channels_regex = '|'.join(re.escape(element) for element in all_channels)
+    return r'^(.*?)(' + channels_regex + ')(.*?)(?:' + '|'.join(channels_dict["image_extensions"]) + ')\\b'
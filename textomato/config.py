@@ -0,0 +1,178 @@
+#  Cached, immutable plugin configuration
+#
+#  The settings and the custom regex are JSON files in user/, with their
+#  defaults in res/. ConfigService reads a file once and again only when its
+#  mtime or size changed, and hands out frozen values: the settings as a
+#  FrozenDict and the channel config as a ChannelConfig with its compiled
+#  classifier. Both are hashable and never change, so import threads can
+#  share them; an edited file gives new objects instead of changing old ones.
+#
+#  Pure Python, no c4d / maxon imports.
+#
+import json
+import os
+import threading
+from collections import namedtuple
+from collections.abc import Mapping
+
+from .channels import GetClassifier
+
+SETTINGS_FILE = "settings.json"
+CUSTOM_REGEX_FILE = "custom_regex.json"
+
+def _Freeze(value):
+    if isinstance(value, Mapping):
+        return FrozenDict(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_Freeze(item) for item in value)
+    return value
+
+def _Thaw(value):
+    if isinstance(value, FrozenDict):
+        return {key: _Thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_Thaw(item) for item in value]
+    return value
+
+class FrozenDict(Mapping):
+    """
+    Read-only, hashable dict; nested dicts and lists are frozen too (lists become tuples).
+    """
+    __slots__ = ("_data", "_hash")
+
+    def __init__(self, data=()):
+        self._data = {key: _Freeze(value) for key, value in dict(data).items()}
+        self._hash = None
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(frozenset(self._data.items()))
+        return self._hash
+
+    def __repr__(self):
+        return "FrozenDict(%r)" % self._data
+
+    def Thaw(self):
+        """
+        A plain, mutable deep copy, e.g. for writing it as JSON.
+        """
+        return _Thaw(self)
+
+# What classifies filenames for an import: the custom regex (None if off), the case flag and the compiled classifier
+ChannelConfig = namedtuple("ChannelConfig", ["custom_regex", "case_insensitive", "classifier"])
+
+class ConfigService:
+    """
+    Settings and custom regex of the plugin, read once and reloaded when their file changes.
+
+    Parameters
+    ----------
+    root : str
+        The plugin folder, the files are read from root/user with root/res as fallback.
+    """
+
+    def __init__(self, root):
+        self.user_folder = os.path.join(root, "user")
+        self.default_folder = os.path.join(root, "res")
+        self.lock = threading.Lock()
+        self.files = {}
+        self.channel_configs = {}
+        self.loads = 0
+
+    def _Stamp(self, name):
+        for folder in (self.user_folder, self.default_folder):
+            path = os.path.join(folder, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            return path, stat.st_mtime_ns, stat.st_size
+        raise FileNotFoundError("No %s in %s or %s" % (name, self.user_folder, self.default_folder))
+
+    def _Read(self, name):
+        stamp = self._Stamp(name)
+        with self.lock:
+            entry = self.files.get(name)
+            if entry is not None and entry[0] == stamp:
+                return entry[1]
+        with open(stamp[0], "r") as read_file:
+            data = FrozenDict(json.load(read_file))
+        with self.lock:
+            self.files[name] = (stamp, data)
+            self.loads += 1
+        return data
+
+    def _Write(self, name, data):
+        os.makedirs(self.user_folder, exist_ok=True)
+        path = os.path.join(self.user_folder, name)
+        temp_file = path + ".tmp"
+        with open(temp_file, "w") as write_file:
+            json.dump(_Thaw(data), write_file, indent=4)
+        os.replace(temp_file, path)
+        frozen = _Freeze(data)
+        stat = os.stat(path)
+        with self.lock:
+            self.files[name] = ((path, stat.st_mtime_ns, stat.st_size), frozen)
+        return frozen
+
+    def Settings(self):
+        """
+        The current settings as a FrozenDict, user/settings.json or the defaults.
+        """
+        return self._Read(SETTINGS_FILE)
+
+    def DefaultSettings(self):
+        with open(os.path.join(self.default_folder, SETTINGS_FILE), "r") as read_file:
+            return FrozenDict(json.load(read_file))
+
+    def UpdateSettings(self, changes):
+        """
+        Merges changed values into the settings and writes them, unless nothing changed.
+
+        Returns
+        -------
+        bool
+            True if the file was written.
+        """
+        settings = self.Settings()
+        merged = FrozenDict(dict(settings, **changes))
+        if merged == settings and os.path.isfile(os.path.join(self.user_folder, SETTINGS_FILE)):
+            return False
+        self._Write(SETTINGS_FILE, merged)
+        return True
+
+    def ResetSettings(self):
+        self._Write(SETTINGS_FILE, self.DefaultSettings())
+
+    def CustomRegex(self):
+        """
+        The custom regex as a FrozenDict of channel type -> tokens.
+        """
+        return self._Read(CUSTOM_REGEX_FILE)
+
+    def SaveCustomRegex(self, custom_regex):
+        self._Write(CUSTOM_REGEX_FILE, custom_regex)
+
+    def ChannelConfig(self, custom_regex=False, case_insensitive=False):
+        """
+        The ChannelConfig for the given flags, built once per distinct custom regex.
+        """
+        regex = self.CustomRegex() if custom_regex else None
+        key = (regex, case_insensitive)
+        with self.lock:
+            config = self.channel_configs.get(key)
+        if config is None:
+            classifier = GetClassifier(regex.Thaw() if regex is not None else None, case_insensitive)
+            config = ChannelConfig(regex, case_insensitive, classifier)
+            with self.lock:
+                self.channel_configs[key] = config
+        return config
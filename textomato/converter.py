@@ -0,0 +1,176 @@
+#  Pre-flight texture conversion
+#
+#  Runs every texture of an import through an external converter (by default
+#  Redshift's texture processor, which writes tiled, mipmapped .rstexbin
+#  files) before the materials are built, so render nodes don't each convert
+#  the same PNG / JPG / TGA at render time. The texture nodes then point at
+#  the converted files.
+#
+#  The command is a template, e.g.  redshiftTextureProcessor "{input}"  or
+#  python my_stub.py "{input}" "{output}", so any tool or a local stub can
+#  be plugged in. Conversions run as separate processes, at most `jobs` at a
+#  time; threads only wait on them. Outputs newer than their source are reused.
+#  A conversion running longer than the timeout is killed, and so are the
+#  running ones when the import is cancelled.
+#
+#  Pure Python, no c4d / maxon imports.
+#
+import os
+import shlex
+import subprocess
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_COMMAND = 'redshiftTextureProcessor "{input}"'
+DEFAULT_OUTPUT = "{folder}/{stem}.rstexbin"
+DEFAULT_JOBS = 4
+DEFAULT_TIMEOUT = 600.0  # seconds a single conversion may take
+CANCEL_POLL_SECONDS = 0.2  # how often Run checks for a cancel while conversions are running
+
+CONVERTED = "converted"
+CURRENT = "current"     # output already newer than its source
+FAILED = "failed"
+
+ConvertResult = namedtuple("ConvertResult", ["source", "output", "status", "message"])
+
+class TextureConverter:
+    """
+    Converts texture files with an external command.
+
+    Parameters
+    ----------
+    command : str
+        Command line template, {input} and {output} are replaced per file.
+        It is split into arguments before the paths are filled in, so paths
+        with spaces need no quoting.
+    output_pattern : str
+        Where the converter writes its output; {folder}, {stem} and {ext}
+        (without the dot) come from the source path.
+    jobs : int
+        Conversions running at the same time.
+    timeout : float
+        Seconds before a conversion is killed and counted as failed, None waits.
+    """
+
+    def __init__(self, command=DEFAULT_COMMAND, output_pattern=DEFAULT_OUTPUT, jobs=DEFAULT_JOBS, timeout=DEFAULT_TIMEOUT):
+        self.arguments = shlex.split(command, posix=os.name != "nt")
+        if not self.arguments:
+            raise ValueError("Empty converter command")
+        self.output_pattern = output_pattern
+        self.jobs = max(1, jobs)
+        self.timeout = timeout
+        self.elapsed = 0.0
+        self.lock = threading.Lock()
+        self.processes = {}  # source -> Popen of the running conversions
+        self.cancelled = False
+
+    def OutputPath(self, source):
+        folder, filename = os.path.split(source)
+        stem, ext = os.path.splitext(filename)
+        return os.path.normpath(self.output_pattern.format(folder=folder, stem=stem, ext=ext[1:]))
+
+    def IsCurrent(self, source, output):
+        try:
+            return os.stat(output).st_mtime_ns >= os.stat(source).st_mtime_ns
+        except OSError:
+            return False
+
+    def _Convert(self, source):
+        output = self.OutputPath(source)
+        if self.IsCurrent(source, output):
+            return ConvertResult(source, output, CURRENT, "")
+        arguments = [argument.replace("{input}", source).replace("{output}", output) for argument in self.arguments]
+        arguments = [argument.strip('"') for argument in arguments] if os.name == "nt" else arguments
+        try:
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            with self.lock:
+                if self.cancelled:
+                    return ConvertResult(source, output, FAILED, "cancelled")
+                process = self.processes[source] = subprocess.Popen(arguments, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            try:
+                stdout, _ = process.communicate(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                return ConvertResult(source, output, FAILED, "timed out after %gs" % self.timeout)
+            finally:
+                with self.lock:
+                    self.processes.pop(source, None)
+        except (OSError, subprocess.SubprocessError) as e:
+            return ConvertResult(source, output, FAILED, str(e))
+        if self.cancelled:
+            return ConvertResult(source, output, FAILED, "cancelled")
+        if process.returncode != 0:
+            message = stdout.decode("utf-8", "replace").strip().splitlines()
+            return ConvertResult(source, output, FAILED, "exit code %d: %s" % (process.returncode, message[-1] if message else ""))
+        if not os.path.isfile(output):
+            return ConvertResult(source, output, FAILED, "converter wrote no " + os.path.basename(output))
+        return ConvertResult(source, output, CONVERTED, "")
+
+    def Run(self, sources, progress=None, cancelled=None):
+        """
+        Converts the files that have no current output.
+
+        Parameters
+        ----------
+        sources : iterable
+            Texture files, duplicates are converted once.
+        progress : callable
+            Called as progress(done, total, result) in the calling thread after every file.
+        cancelled : callable
+            Polled while conversions run; once it returns True the queued files
+            are dropped and the running conversions killed, see Cancel.
+
+        Returns
+        -------
+        list of ConvertResult in completion order, without the dropped and killed files.
+        """
+        start = time.perf_counter()
+        sources = list(dict.fromkeys(sources))
+        results = []
+        with ThreadPoolExecutor(max_workers=min(self.jobs, len(sources) or 1)) as executor:
+            futures = [executor.submit(self._Convert, source) for source in sources]
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=CANCEL_POLL_SECONDS if cancelled is not None else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results.append(future.result())
+                    if progress is not None:
+                        progress(len(results), len(sources), results[-1])
+                if cancelled is not None and cancelled():
+                    for future in futures:
+                        future.cancel()
+                    self.Cancel()
+                    break
+        self.elapsed = time.perf_counter() - start
+        return results
+
+    def Cancel(self):
+        """
+        Kills the running conversions, the ones not started yet fail right away. Thread safe.
+        """
+        with self.lock:
+            self.cancelled = True
+            processes = list(self.processes.values())
+        for process in processes:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+def ConvertedPaths(results):
+    """
+    source -> output of every file that has a usable converted output.
+    """
+    return {result.source: result.output for result in results if result.status != FAILED}
+
+def Report(results, elapsed):
+    """
+    One line summary of a Run.
+    """
+    counts = {CONVERTED: 0, CURRENT: 0, FAILED: 0}
+    for result in results:
+        counts[result.status] += 1
+    return "%d converted, %d up to date, %d failed in %.1fs" % (counts[CONVERTED], counts[CURRENT], counts[FAILED], elapsed)
@@ -0,0 +1,146 @@
+#  Index of the materials already in a document
+#
+#  Built once per import from the names and texture paths (texturesampler /
+#  sprite tex0) of the document's materials. Import-from-folder asks it which
+#  texture sets are new, which are already there and which gained textures,
+#  so re-running an import over a library folder only builds what changed.
+#
+#  Pure Python, no c4d / maxon imports.
+#
+import os
+
+NEW = "new"
+PRESENT = "present"
+CHANGED = "changed"
+
+def NormalizePath(path):
+    """
+    A texture path the way the index compares it.
+    """
+    return os.path.normcase(os.path.normpath(str(path)))
+
+class DocumentIndex:
+    """
+    Materials of a document by name and by the texture paths they use.
+
+    The material objects are only stored, never touched, so the index can be
+    built on the main thread and read from the import thread.
+    """
+
+    def __init__(self):
+        self.by_name = {}
+        self.by_path = {}
+        self.materials = 0
+
+    def Add(self, name, material, texture_paths):
+        """
+        Indexes a material under its name and the paths of its texture nodes.
+        """
+        paths = frozenset(NormalizePath(path) for path in texture_paths if path)
+        self.by_name.setdefault(name, []).append((material, paths))
+        for path in paths:
+            self.by_path.setdefault(path, []).append(material)
+        self.materials += 1
+
+    def Named(self, name):
+        """
+        The materials called name.
+        """
+        return [material for material, _ in self.by_name.get(name, ())]
+
+    def Users(self, path):
+        """
+        The materials with a texture node reading path.
+        """
+        return list(self.by_path.get(NormalizePath(path), ()))
+
+    def _Users(self, candidates):
+        users = set()
+        for path in candidates:
+            users.update(self.by_path.get(path, ()))
+        return users
+
+    def _Candidates(self, texture_paths, alias):
+        paths = set()
+        for path in texture_paths:
+            candidates = (NormalizePath(path),)
+            if alias is not None:
+                candidates += (NormalizePath(alias(path)),)
+            paths.add(candidates)
+        return paths
+
+    def _Owners(self, paths):
+        users = None
+        for candidates in paths:
+            users = self._Users(candidates) if users is None else users & self._Users(candidates)
+            if not users:
+                break
+        return users or set()
+
+    def Owners(self, texture_paths, alias=None):
+        """
+        The materials using every one of texture_paths, whatever their name, see Find for alias.
+        """
+        return list(self._Owners(self._Candidates(texture_paths, alias)))
+
+    def Find(self, name, texture_paths, alias=None):
+        """
+        Looks up the material a texture set would become.
+
+        A set is present if a material with its name, or any material, already
+        uses all of its textures. It changed if a material with its name uses
+        some of them but lacks others, e.g. after a channel was added to the set.
+        A material that only shares the name is left alone, the set is new.
+        Extra textures in the material don't count, they may be the user's.
+
+        Parameters
+        ----------
+        name : str
+            Name the material would get.
+        texture_paths : iterable of str
+            The set's texture paths.
+        alias : callable
+            alias(path) -> the path a texture may have been written as instead,
+            e.g. its converted file, so an import with conversion finds itself.
+
+        Returns
+        -------
+        (status, material)
+            NEW and None, or PRESENT / CHANGED and the existing material.
+        """
+        paths = self._Candidates(texture_paths, alias)
+        named = self.by_name.get(name, ())
+        for material, material_paths in named:
+            if all(not material_paths.isdisjoint(candidates) for candidates in paths):
+                return PRESENT, material
+        users = self._Owners(paths)
+        if users:
+            # Renamed since it was imported
+            return PRESENT, next(iter(users))
+        for material, material_paths in named:
+            if any(not material_paths.isdisjoint(candidates) for candidates in paths):
+                return CHANGED, material
+        return NEW, None
+
+    def Partition(self, material_sets, alias=None):
+        """
+        Drops the (name, [(channel, filepath), ...]) sets that are present, see Find.
+
+        Returns
+        -------
+        (material_sets, changed, present)
+            The new and changed sets in their order with all of their textures,
+            the existing material of each of them (None for new sets) and the
+            number of sets left out.
+        """
+        selected = []
+        changed = []
+        present = 0
+        for name, tex_tuples in material_sets:
+            status, material = self.Find(name, [filepath for _, filepath in tex_tuples], alias)
+            if status == PRESENT:
+                present += 1
+                continue
+            selected.append((name, tex_tuples))
+            changed.append(material)
+        return selected, changed, present
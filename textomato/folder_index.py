@@ -0,0 +1,331 @@
+#  Persistent directory index for texture folders
+#
+#  Stores the directory listing and channel classification of every scanned
+#  folder in user/folder_index.json. An entry is reused as long as the
+#  folder's mtime and the classifier's config hash are unchanged, so repeated
+#  imports from big (network) folders skip both the listing and the matching.
+#  The index is shared by the import thread and the dialog, a lock guards it
+#  and its file; folders are listed outside of it.
+#
+#  Pure Python, no c4d / maxon imports.
+#
+import glob
+import json
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+from .channels import ChannelMatch, SplitResolution, SplitTile, StripTileToken, UDIM_TOKEN, UVTILE_TOKEN, UVTILE_ZERO_TOKEN
+
+INDEX_VERSION = 1
+
+# Which variant of a texture set shipped in several resolutions (_1K, _2K, ...) gets imported
+RESOLUTION_POLICIES = OrderedDict([
+    ("all", "Import every resolution as it is named"),
+    ("lowest", "Lowest resolution (lookdev)"),
+    ("max2k", "Highest up to 2K"),
+    ("max4k", "Highest up to 4K"),
+    ("highest", "Highest resolution"),
+])
+DEFAULT_RESOLUTION_POLICY = "max4k"
+
+IndexedFile = namedtuple("IndexedFile", ["filename", "match"])
+
+def _FolderKey(folder):
+    return os.path.normcase(os.path.abspath(folder))
+
+def _FolderMtime(folder):
+    return os.stat(folder).st_mtime_ns
+
+def _ClassifyRows(folder, classifier):
+    rows = []
+    with os.scandir(folder) as it:
+        for dir_entry in it:
+            filename = dir_entry.name
+            if not classifier.HasImageExtension(filename) or not dir_entry.is_file():
+                continue
+            match = classifier.Match(filename)
+            rows.append([filename] if match is None else [filename, match.prefix, match.channel, match.channel_type, match.extension])
+    rows.sort()
+    return rows
+
+def _RowsToFiles(rows):
+    return [IndexedFile(row[0], ChannelMatch(*row[1:]) if len(row) > 1 else None) for row in rows]
+
+def ClassifyFolder(folder, classifier):
+    """
+    Uncached listing and classification of a folder's image files, see FolderIndex.Scan.
+    """
+    return _RowsToFiles(_ClassifyRows(folder, classifier))
+
+class FolderIndex:
+    """
+    LRU cache of classified folder listings, persisted as JSON.
+
+    Parameters
+    ----------
+    index_file : str
+        Path of the JSON file the index is stored in.
+    max_files : int
+        Upper bound of filenames kept over all folders; least recently used folders are evicted first.
+    max_folders : int
+        Upper bound of folders kept.
+    """
+
+    def __init__(self, index_file, max_files=250000, max_folders=512):
+        self.index_file = index_file
+        self.max_files = max_files
+        self.max_folders = max_folders
+        self.entries = None
+        self.file_count = 0
+        self.dirty = False
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def _Load(self):
+        if self.entries is not None:
+            return
+        self.entries = OrderedDict()
+        self.file_count = 0
+        try:
+            with open(self.index_file, "r") as read_file:
+                data = json.load(read_file)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        for folder, entry in data.get("folders", []):
+            self.entries[folder] = entry
+            self.file_count += len(entry["files"])
+
+    def Save(self):
+        """
+        Writes the index if it changed since it was loaded.
+        """
+        with self.lock:
+            if not self.dirty or self.entries is None:
+                return
+            directory = os.path.dirname(self.index_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_file = self.index_file + ".tmp"
+            try:
+                with open(temp_file, "w") as write_file:
+                    json.dump({"version": INDEX_VERSION, "folders": list(self.entries.items())}, write_file, separators=(",", ":"))
+                os.replace(temp_file, self.index_file)
+                self.dirty = False
+            except OSError as e:
+                print("[WARNING] Could not write texture folder index: " + str(e))
+
+    def _Evict(self):
+        while self.entries and (self.file_count > self.max_files or len(self.entries) > self.max_folders):
+            _, entry = self.entries.popitem(last=False)
+            self.file_count -= len(entry["files"])
+
+    def _Store(self, key, entry):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.file_count -= len(old["files"])
+        self.entries[key] = entry
+        self.file_count += len(entry["files"])
+        self.dirty = True
+        self._Evict()
+
+    def _Build(self, folder, classifier, mtime):
+        return {"mtime": mtime, "config": classifier.config_hash, "files": _ClassifyRows(folder, classifier)}
+
+    def Scan(self, folder, classifier):
+        """
+        Returns the image files of a folder with their classification.
+
+        Parameters
+        ----------
+        folder : str
+            The texture folder.
+        classifier : textomato.channels.ChannelClassifier
+            The classifier of the active channel config.
+
+        Returns
+        -------
+        list of IndexedFile, the match is None for images without a channel token.
+        """
+        key = _FolderKey(folder)
+        mtime = _FolderMtime(folder)
+        with self.lock:
+            self._Load()
+            entry = self.entries.get(key)
+            if entry is not None and entry["mtime"] == mtime and entry["config"] == classifier.config_hash:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return _RowsToFiles(entry["files"])
+        entry = self._Build(folder, classifier, mtime)
+        with self.lock:
+            self._Load()
+            self._Store(key, entry)
+            self.misses += 1
+        return _RowsToFiles(entry["files"])
+
+    def Rebuild(self, folder=None, classifier=None):
+        """
+        Drops the whole index, then re-indexes the given folder if there is one.
+        """
+        with self.lock:
+            self._Load()
+            self.entries.clear()
+            self.file_count = 0
+            self.dirty = True
+        if folder and classifier is not None and os.path.isdir(folder):
+            self.Scan(folder, classifier)
+        self.Save()
+
+def GroupFolder(folder, indexed_files):
+    """
+    Material sets of a scanned folder: prefix -> [(channel, filepath), ...] in file order.
+    This is how import-from-folder groups textures into materials.
+    """
+    groups = {}
+    for filename, match in indexed_files:
+        if match is not None:
+            groups.setdefault(match.prefix, []).append((match.channel, os.path.join(folder, filename)))
+    return groups
+
+def GroupByPrefix(indexed_files, classifier, resolution_policy="all"):
+    """
+    Reverse index of a scanned folder: folded prefix -> [(channel, filename), ...].
+    Lets import-from-base answer every material sharing a folder from a single scan.
+    With a resolution policy other than "all" the prefixes are keyed without
+    their resolution token, see SelectResolution, and tile sets are keyed
+    without their tile, see CollapseTiles.
+    """
+    groups = {}
+    for filename, match in indexed_files:
+        if match is not None:
+            groups.setdefault(classifier.Fold(match.prefix), []).append((match.channel, filename))
+    material_sets = list(groups.items())
+    if resolution_policy != "all":
+        material_sets = SelectResolution(material_sets, resolution_policy)[0]
+    return dict(CollapseTiles(material_sets)[0])
+
+def _PickResolution(resolutions, policy):
+    if policy == "lowest":
+        return resolutions[0]
+    if policy == "highest":
+        return resolutions[-1]
+    limit = int(policy[3:-1])  # "max4k" -> 4
+    allowed = [resolution for resolution in resolutions if resolution <= limit]
+    return allowed[-1] if allowed else resolutions[0]
+
+def SelectResolution(material_sets, policy):
+    """
+    Folds resolution variants of texture sets into one set and picks the variant a policy asks for.
+
+    The resolution token may sit in the prefix (Wood_4K_Color.png, one group
+    per resolution) or after the channel (Wood_Color_4K.png, all resolutions
+    in one group); both end up as the set "Wood_". Textures without a token
+    are added to the picked variant unless it has the same channel.
+
+    Parameters
+    ----------
+    material_sets : list
+        (prefix, [(channel, filepath), ...]) pairs as GroupFolder or a manifest give them.
+        Filepaths can also be bare filenames.
+    policy : str
+        A key of RESOLUTION_POLICIES, "all" returns the sets unchanged.
+
+    Returns
+    -------
+    (material_sets, dropped)
+        The selected sets in the same form and the number of textures left out.
+    """
+    if policy == "all":
+        return material_sets, 0
+    variants = OrderedDict()
+    for prefix, tex_tuples in material_sets:
+        set_prefix, prefix_resolution = SplitResolution(prefix)
+        for channel_name, filepath in tex_tuples:
+            # Sets of the same prefix in different folders (a manifest spans subfolders) stay apart
+            by_resolution = variants.setdefault((os.path.dirname(filepath), set_prefix), {})
+            resolution = prefix_resolution
+            if resolution is None:
+                # Only look behind the channel token, prefix + channel is the start of the filename
+                _, resolution = SplitResolution(os.path.basename(filepath)[len(prefix) + len(channel_name):])
+            by_resolution.setdefault(resolution, []).append((channel_name, filepath))
+
+    selected = []
+    dropped = 0
+    for (_, set_prefix), by_resolution in variants.items():
+        untokened = by_resolution.pop(None, [])
+        if not by_resolution:
+            selected.append((set_prefix, untokened))
+            continue
+        resolution = _PickResolution(sorted(by_resolution), policy)
+        tex_tuples = by_resolution[resolution]
+        channel_names = set(channel_name for channel_name, _ in tex_tuples)
+        shared = [tex_tuple for tex_tuple in untokened if tex_tuple[0] not in channel_names]
+        selected.append((set_prefix, tex_tuples + shared))
+        dropped += sum(len(tex_tuples) for tex_tuples in by_resolution.values()) + len(untokened) - len(tex_tuples) - len(shared)
+    return selected, dropped
+
+def CollapseTiles(material_sets):
+    """
+    Collapses the tiles of UDIM (.1001) and UV tile (_u1_v1) sets into one texture with a <UDIM> / <UVTILE> path.
+
+    A tile number in the prefix (asset.1001_Color.exr) would make a material
+    per tile and one after the channel (asset_Color.1001.exr) a texture node
+    per tile; both become one texture of the set "asset_". A number only
+    counts as a tile if its path has at least two of them, so a lone
+    Wood_1024_Color.png stays as it is. Sets with tiles starting at u0 / v0
+    get the zero based <uvtile> token.
+
+    Parameters
+    ----------
+    material_sets : list
+        (prefix, [(channel, filepath), ...]) pairs, filepaths can also be bare filenames.
+
+    Returns
+    -------
+    (material_sets, collapsed)
+        The sets with tiled textures and the number of tile files folded away.
+    """
+    tiles = {}
+    parsed = []
+    for prefix, tex_tuples in material_sets:
+        for channel_name, filepath in tex_tuples:
+            folder, filename = os.path.split(filepath)
+            tiled_filename, tile = SplitTile(filename)
+            tiled = None
+            if tile is not None:
+                tiled = os.path.join(folder, tiled_filename)
+                tiles.setdefault(tiled, set()).add(tile)
+            parsed.append((prefix, channel_name, filepath, tiled))
+
+    collapsed_sets = OrderedDict()
+    seen = set()
+    collapsed = 0
+    for prefix, channel_name, filepath, tiled in parsed:
+        if tiled is not None and len(tiles[tiled]) > 1:
+            if tiled in seen:
+                collapsed += 1
+                continue
+            seen.add(tiled)
+            tiled_prefix, prefix_tile = SplitTile(prefix)
+            if prefix_tile is not None:
+                prefix = StripTileToken(tiled_prefix)
+            if UVTILE_TOKEN in tiled and min(min(tile) for tile in tiles[tiled]) == 0:
+                tiled = tiled.replace(UVTILE_TOKEN, UVTILE_ZERO_TOKEN)
+            filepath = tiled
+        collapsed_sets.setdefault((os.path.dirname(filepath), prefix), []).append((channel_name, filepath))
+    return [(prefix, tex_tuples) for (_, prefix), tex_tuples in collapsed_sets.items()], collapsed
+
+_TILE_GLOBS = ((UDIM_TOKEN, "1[0-9][0-9][0-9]"), (UVTILE_TOKEN, "u*_v*"), (UVTILE_ZERO_TOKEN, "u*_v*"))
+
+def ExpandTiles(tiled_path):
+    """
+    Returns the existing tile files of a <UDIM> / <UVTILE> path, sorted.
+    """
+    pattern = glob.escape(tiled_path)
+    for token, wildcard in _TILE_GLOBS:
+        pattern = pattern.replace(token, wildcard)
+    tiled_filename = os.path.basename(tiled_path).replace(UVTILE_ZERO_TOKEN, UVTILE_TOKEN)
+    return sorted(filepath for filepath in glob.glob(pattern) if SplitTile(os.path.basename(filepath))[0] == tiled_filename)
@@ -0,0 +1,217 @@
+#  Watch-folder live sync
+#
+#  Polls a texture folder and reports how its texture sets changed since the
+#  last look. A poll is a single os.stat of the folder: adding, removing or
+#  renaming a file changes the folder's mtime, and only then is the folder
+#  listed and classified again, on a worker thread. A change is only picked
+#  up once the folder has been quiet for a moment, so exports that are still
+#  being written don't show up half done. The poll interval stretches with
+#  the time a listing takes, which keeps the listing to a fixed share of the
+#  time however many files the folder holds. Files overwritten in place keep
+#  their path, the materials using them need no change.
+#
+#  Pure Python, no c4d / maxon imports.
+#
+import os
+import threading
+import time
+import traceback
+from collections import namedtuple
+
+from .folder_index import ClassifyFolder, CollapseTiles, GroupFolder, SelectResolution
+
+POLL_SECONDS = 1.0      # shortest time between two polls
+SETTLE_SECONDS = 2.0    # how long the folder has to stay unchanged before it is listed
+SCAN_SHARE = 0.05       # most of the time spent listing the folder
+
+# A set whose files changed: new and gone (channel, filepath) tuples, files
+# replaced by another of the same channel as (old, new) paths, and the rest
+SetChange = namedtuple("SetChange", ["prefix", "added", "removed", "moved", "kept"])
+# A set whose prefix changed while its channels stayed the same
+SetRename = namedtuple("SetRename", ["old_prefix", "new_prefix", "moved"])
+# What changed between two snapshots, every list sorted by prefix
+FolderChanges = namedtuple("FolderChanges", ["added", "removed", "renamed", "changed"])
+
+def SnapshotFolder(folder, classifier, resolution_policy="all"):
+    """
+    The texture sets of a folder as import-from-folder groups them: prefix -> frozenset of (channel, filepath).
+    """
+    material_sets = list(GroupFolder(folder, ClassifyFolder(folder, classifier)).items())
+    material_sets = SelectResolution(material_sets, resolution_policy)[0]
+    material_sets = CollapseTiles(material_sets)[0]
+    return {prefix: frozenset(tex_tuples) for prefix, tex_tuples in material_sets}
+
+def _Tails(prefix, tex_tuples):
+    # A set without its prefix, equal for the sets of a renamed prefix
+    return {(channel_name, os.path.basename(filepath)[len(prefix):]): filepath for channel_name, filepath in tex_tuples}
+
+def _Moves(removed, added):
+    # Files of a set replaced by another file of the same channel, e.g. Wood_Color.jpg -> Wood_Color.png
+    old_by_channel = {}
+    for channel_name, filepath in removed:
+        old_by_channel.setdefault(channel_name, []).append(filepath)
+    moved = []
+    still_added = []
+    for channel_name, filepath in added:
+        old_paths = old_by_channel.get(channel_name)
+        if old_paths:
+            moved.append((old_paths.pop(0), filepath))
+        else:
+            still_added.append((channel_name, filepath))
+    still_removed = [(channel_name, filepath) for channel_name, paths in old_by_channel.items() for filepath in paths]
+    return sorted(still_added), sorted(still_removed), sorted(moved)
+
+def DiffSnapshots(old, new):
+    """
+    Compares two SnapshotFolder results.
+
+    Returns
+    -------
+    FolderChanges
+        added and removed are (prefix, [(channel, filepath), ...]) pairs,
+        renamed SetRename and changed SetChange tuples.
+    """
+    added = {prefix: tex_tuples for prefix, tex_tuples in new.items() if prefix not in old}
+    removed = {prefix: tex_tuples for prefix, tex_tuples in old.items() if prefix not in new}
+
+    renamed = []
+    if added and removed:
+        by_tails = {}
+        for prefix in sorted(added):
+            tails = _Tails(prefix, added[prefix])
+            by_tails.setdefault(frozenset(tails), []).append((prefix, tails))
+        for old_prefix in sorted(removed):
+            old_tails = _Tails(old_prefix, removed[old_prefix])
+            candidates = by_tails.get(frozenset(old_tails))
+            if not candidates:
+                continue
+            new_prefix, new_tails = candidates.pop(0)
+            renamed.append(SetRename(old_prefix, new_prefix, sorted((filepath, new_tails[tail]) for tail, filepath in old_tails.items())))
+            del removed[old_prefix]
+            del added[new_prefix]
+
+    changed = []
+    for prefix in sorted(old.keys() & new.keys()):
+        if old[prefix] != new[prefix]:
+            still_added, still_removed, moved = _Moves(old[prefix] - new[prefix], new[prefix] - old[prefix])
+            changed.append(SetChange(prefix, still_added, still_removed, moved, sorted(old[prefix] & new[prefix])))
+
+    return FolderChanges(
+        [(prefix, sorted(added[prefix])) for prefix in sorted(added)],
+        [(prefix, sorted(removed[prefix])) for prefix in sorted(removed)],
+        renamed,
+        changed,
+    )
+
+def Report(changes):
+    parts = []
+    for count, label in ((len(changes.added), "new"), (len(changes.changed), "changed"), (len(changes.renamed), "renamed"), (len(changes.removed), "removed")):
+        if count:
+            parts.append("%d %s" % (count, label))
+    return (", ".join(parts) if parts else "no") + " texture sets"
+
+class FolderWatch:
+    """
+    Polls a texture folder for changed texture sets.
+
+    Parameters
+    ----------
+    folder : str
+        The watched folder, its subfolders aren't watched.
+    classifier : textomato.channels.ChannelClassifier
+        The classifier of the active channel config.
+    resolution_policy : str
+        A key of textomato.folder_index.RESOLUTION_POLICIES, sets are compared the way they are imported.
+    """
+
+    def __init__(self, folder, classifier, resolution_policy="all", poll_seconds=POLL_SECONDS, settle_seconds=SETTLE_SECONDS):
+        self.folder = folder
+        self.classifier = classifier
+        self.resolution_policy = resolution_policy
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.snapshot = None
+        self.mtime = None
+        self.changed_at = None
+        self.next_poll = 0.0
+        self.thread = None
+        self.scanned = None
+        self.error = None
+        self.scan_seconds = 0.0
+        self.polls = 0
+        self.scans = 0
+
+    def _Scan(self):
+        start = time.perf_counter()
+        try:
+            self.scanned = SnapshotFolder(self.folder, self.classifier, self.resolution_policy)
+        except Exception:
+            self.scanned = None
+            self.error = traceback.format_exc()
+        self.scan_seconds = time.perf_counter() - start
+
+    def _StartScan(self):
+        self.error = None
+        self.scans += 1
+        self.thread = threading.Thread(target=self._Scan, name="TexToMatO watch", daemon=True)
+        self.thread.start()
+
+    def Start(self):
+        """
+        Takes the first snapshot on a worker thread, changes are reported against it.
+        """
+        self.mtime = os.stat(self.folder).st_mtime_ns
+        self._StartScan()
+
+    def IsReady(self):
+        return self.snapshot is not None
+
+    def Interval(self):
+        """
+        Seconds between two polls, longer for folders that take long to list.
+        """
+        return max(self.poll_seconds, self.scan_seconds / SCAN_SHARE)
+
+    def Poll(self, now=None):
+        """
+        Cheap unless the folder changed, meant to be called from a timer.
+
+        Returns
+        -------
+        FolderChanges or None
+            The changes since the last reported snapshot, None while there are none.
+        """
+        now = time.monotonic() if now is None else now
+        if self.thread is not None:
+            if self.thread.is_alive():
+                return None
+            self.thread = None
+            return self._TakeScan()
+        if now < self.next_poll:
+            return None
+        self.next_poll = now + self.Interval()
+        self.polls += 1
+        try:
+            mtime = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            return None # Folder gone or unreachable for now, kept as it was
+        if mtime != self.mtime:
+            self.mtime = mtime
+            self.changed_at = now
+        elif self.changed_at is not None and now - self.changed_at >= self.settle_seconds:
+            self.changed_at = None
+            self._StartScan()
+        return None
+
+    def _TakeScan(self):
+        scanned, self.scanned = self.scanned, None
+        if scanned is None:
+            return None
+        if self.snapshot is None:
+            self.snapshot = scanned
+            return None
+        changes = DiffSnapshots(self.snapshot, scanned)
+        self.snapshot = scanned
+        if not any(changes):
+            return None
+        return changes
@@ -0,0 +1,183 @@
+#  Reconciling build plans with existing node graphs
+#
+#  Re-importing into a material used to add a full set of nodes on top of
+#  what it had. PlanPatch matches the nodes of a BuildPlan to the shaders
+#  already in the graph instead: texture nodes by their file, every other
+#  node by the wire it sits on next to an already matched node. Only the
+#  unmatched nodes are created, only missing wires drawn, and the nodes
+#  whose wires got replaced are removed, as are the dead ends earlier
+#  imports of the same textures left behind and the chains of textures that
+#  were taken out of the set. Applying the same plan again changes nothing.
+#
+#  The graph is passed in as plain data (handles, shader ids, full port ids),
+#  reconcileBuildPlan in TexToMatO.pyp reads it from RedshiftNodeMaterial.
+#
+#  Pure Python, no c4d / maxon imports.
+#
+from collections import namedtuple
+
+from .build_plan import OUTPUT, ROOT
+from .document_index import NormalizePath
+
+# matches: plan key -> handle of the existing node it is (ROOT and OUTPUT included)
+# add: the plan's NodeSpecs to create, connect: the plan's Edges to draw
+# remove: handles of existing nodes to delete
+GraphPatch = namedtuple("GraphPatch", ["matches", "add", "connect", "remove"])
+
+def PlanPatch(plan, nodes, edges, root, output, port_id, removed_paths=()):
+    """
+    Works out the smallest change that turns an existing graph into the one a plan describes.
+
+    Parameters
+    ----------
+    plan : textomato.build_plan.BuildPlan
+        The desired graph.
+    nodes : dict
+        handle -> (shader, texture path or None) of the existing shaders.
+    edges : iterable
+        (source handle, source port id, target handle, target port id) of the existing wires.
+    root, output : hashable
+        Handles of the material's root BRDF and output node, None if it has none.
+    port_id : callable
+        port_id((shader, port)) -> the full port id a plan port has in `edges`.
+    removed_paths : iterable of str
+        Files taken out of the texture set. Their texture nodes are removed with
+        the nodes only they and the plan's nodes feed, e.g. a normal map's bump node.
+
+    Returns
+    -------
+    GraphPatch
+    """
+    plan_shaders = {node.key: node.shader for node in plan.nodes}
+    incoming = {}
+    outgoing = {}
+    feeders = {}
+    for edge in edges:
+        source, source_port, target, target_port = edge
+        incoming[(target, target_port)] = edge
+        outgoing.setdefault(source, []).append(edge)
+        feeders.setdefault(target, []).append(source)
+
+    matches = {}
+    used = set()
+    for key, handle in ((ROOT, root), (OUTPUT, output)):
+        if handle is not None:
+            matches[key] = handle
+            used.add(handle)
+
+    # Texture nodes by their file, wired ones first so a graph doubled by earlier imports keeps its live copy
+    textures = {}
+    for handle, (shader, path) in nodes.items():
+        if path:
+            textures.setdefault((shader, NormalizePath(path)), []).append(handle)
+    for candidates in textures.values():
+        candidates.sort(key=lambda handle: not outgoing.get(handle))
+    for node in plan.nodes:
+        if node.texture is None:
+            continue
+        for handle in textures.get((node.shader, NormalizePath(node.texture[0])), ()):
+            if handle not in used:
+                matches[node.key] = handle
+                used.add(handle)
+                break
+
+    # Every other node by the wire it shares with a matched node, until nothing new matches
+    found = True
+    while found:
+        found = False
+        for edge in plan.edges:
+            source_matched = edge.source in matches
+            target_matched = edge.target in matches
+            if source_matched == target_matched:
+                continue
+            if target_matched:
+                existing = incoming.get((matches[edge.target], port_id(edge.target_port)))
+                if existing is None or existing[0] in used or existing[1] != port_id(edge.source_port):
+                    continue
+                handle = existing[0]
+                if nodes.get(handle, (None,))[0] != plan_shaders.get(edge.source):
+                    continue
+                matches[edge.source] = handle
+            else:
+                handle = None
+                for existing in outgoing.get(matches[edge.source], ()):
+                    if existing[2] in used or existing[1] != port_id(edge.source_port) or existing[3] != port_id(edge.target_port):
+                        continue
+                    if nodes.get(existing[2], (None,))[0] == plan_shaders.get(edge.target):
+                        handle = existing[2]
+                        break
+                if handle is None:
+                    continue
+                matches[edge.target] = handle
+            used.add(handle)
+            found = True
+
+    add = tuple(node for node in plan.nodes if node.key not in matches)
+
+    connect = []
+    dropped = set()
+    for edge in plan.edges:
+        existing = None
+        if edge.target in matches:
+            existing = incoming.get((matches[edge.target], port_id(edge.target_port)))
+        if existing is not None and existing[0] == matches.get(edge.source) and existing[1] == port_id(edge.source_port):
+            continue
+        if existing is not None:
+            # Replaced by the new wire
+            dropped.add(existing)
+        connect.append(edge)
+
+    # Unmatched nodes whose every wire was replaced, dead ends left by earlier imports of the same
+    # textures (a chain ending nowhere that reads one of the plan's files), nodes reading removed files
+    # and what they alone fed, and what only fed any of these
+    plan_paths = set(NormalizePath(node.texture[0]) for node in plan.nodes if node.texture is not None)
+
+    def ReadsPlanTexture(handle, seen):
+        if handle in seen:
+            return False
+        seen.add(handle)
+        path = nodes.get(handle, (None, None))[1]
+        if path and NormalizePath(path) in plan_paths:
+            return True
+        if handle in used:
+            return False # Only the textures of the plan are followed, not what feeds its other nodes
+        return any(ReadsPlanTexture(feeder, seen) for feeder in feeders.get(handle, ()))
+
+    removed_paths = set(NormalizePath(path) for path in removed_paths)
+
+    def FedByRemoved(handle):
+        handle_feeders = feeders.get(handle, ())
+        return any(feeder in remove for feeder in handle_feeders) and all(feeder in remove or feeder in used for feeder in handle_feeders)
+
+    remove = set()
+    changed = True
+    while changed:
+        changed = False
+        for handle, (shader, path) in nodes.items():
+            if handle in used or handle in remove:
+                continue
+            wires = outgoing.get(handle, ())
+            if path and NormalizePath(path) in removed_paths:
+                orphaned = True
+            elif FedByRemoved(handle):
+                orphaned = True
+            elif wires:
+                orphaned = all(wire in dropped or wire[2] in remove for wire in wires)
+            else:
+                orphaned = ReadsPlanTexture(handle, set())
+            if orphaned:
+                remove.add(handle)
+                changed = True
+
+    return GraphPatch(matches, add, tuple(connect), tuple(handle for handle in nodes if handle in remove))
+
+def PatchStats(patch):
+    """
+    Counts of a GraphPatch, for reports.
+    """
+    return {
+        "matched": len(patch.matches),
+        "added": len(patch.add),
+        "wired": len(patch.connect),
+        "removed": len(patch.remove),
+    }
@@ -0,0 +1,298 @@
+#  Header-only image probing
+#
+#  Reads width, height, channel count, bit depth and float-ness of the
+#  image formats TexToMatO imports from the first bytes of the file, without
+#  decoding any pixels. Formats are recognised by their magic bytes, not the
+#  extension. Results are cached by path, mtime and size, and folders of
+#  textures are probed on a thread pool since the work is mostly file I/O.
+#
+#  Pure Python, no c4d / maxon imports.
+#
+import os
+import struct
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+ImageInfo = namedtuple("ImageInfo", ["format", "width", "height", "channels", "bit_depth", "is_float"])
+
+HEADER_BYTES = 4096
+MAX_HEADER_BYTES = 1 << 20  # EXR headers and TIFF directories are followed this far at most
+PROBE_WORKERS = 8
+
+#=============================================
+#               Readers
+#=============================================
+
+class _Source:
+    """
+    Buffered random access to the start of a file, reading more only when a parser asks for it.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.data = file.read(HEADER_BYTES)
+        self.eof = len(self.data) < HEADER_BYTES  # True once a read came back short, the file ends there
+
+    def Read(self, offset, size):
+        end = offset + size
+        if end <= len(self.data):
+            return self.data[offset:end]
+        if end <= MAX_HEADER_BYTES:
+            wanted = end - len(self.data) + HEADER_BYTES
+            more = self.file.read(wanted)
+            self.eof = self.eof or len(more) < wanted
+            self.data += more
+            return self.data[offset:end]
+        self.file.seek(offset)
+        data = self.file.read(size)
+        self.eof = self.eof or len(data) < size
+        return data
+
+    def Find(self, byte, start):
+        """
+        Index of the next byte from start, reading on until it is found. -1 at the end of the file or MAX_HEADER_BYTES.
+        """
+        index = self.data.find(byte, start)
+        while index < 0 and not self.eof and len(self.data) < MAX_HEADER_BYTES:
+            size = len(self.data)
+            self.Read(0, min(size + HEADER_BYTES, MAX_HEADER_BYTES))
+            if len(self.data) == size:
+                break
+            index = self.data.find(byte, start)
+        return index
+
+def _ProbePNG(source):
+    width, height, bit_depth, color_type = struct.unpack(">IIBB", source.Read(16, 10))
+    channels = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}.get(color_type)
+    if color_type == 3:
+        bit_depth = 8  # palette indices expand to 8 bit RGB
+    return ImageInfo("png", width, height, channels, bit_depth, False)
+
+_JPEG_SOF = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+def _ProbeJPEG(source):
+    offset = 2
+    while True:
+        marker = source.Read(offset, 4)
+        if len(marker) < 4 or marker[0] != 0xFF:
+            return None
+        if marker[1] == 0xFF:  # fill byte
+            offset += 1
+            continue
+        if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:  # markers without a length
+            offset += 2
+            continue
+        length = struct.unpack(">H", marker[2:])[0]
+        if marker[1] in _JPEG_SOF:
+            bit_depth, height, width, channels = struct.unpack(">BHHB", source.Read(offset + 4, 6))
+            return ImageInfo("jpg", width, height, channels, bit_depth, False)
+        offset += 2 + length
+
+def _ProbeTGA(source):
+    header = source.Read(0, 18)
+    image_type = header[2]
+    width, height, pixel_depth, descriptor = struct.unpack("<HHBB", header[12:18])
+    if header[1] > 1 or not width or not height or pixel_depth not in (8, 15, 16, 24, 32):
+        return None
+    alpha_bits = descriptor & 0x0F
+    if image_type in (1, 9):  # color mapped
+        return ImageInfo("tga", width, height, 3, 8, False)
+    if image_type in (3, 11):  # grayscale
+        return ImageInfo("tga", width, height, 2 if alpha_bits else 1, 8, False)
+    if image_type in (2, 10):
+        channels = 4 if alpha_bits or pixel_depth == 32 else 3
+        return ImageInfo("tga", width, height, channels, 5 if pixel_depth in (15, 16) else 8, False)
+    return None
+
+_TIFF_TYPES = {3: ("H", 2), 4: ("I", 4), 1: ("B", 1)}
+
+def _ProbeTIFF(source):
+    order = "<" if source.Read(0, 2) == b"II" else ">"
+    ifd = struct.unpack(order + "I", source.Read(4, 4))[0]
+    count = struct.unpack(order + "H", source.Read(ifd, 2))[0]
+    tags = {}
+    for i in range(count):
+        tag, field_type, value_count = struct.unpack(order + "HHI", source.Read(ifd + 2 + i * 12, 8))
+        if tag not in (256, 257, 258, 277, 339) or field_type not in _TIFF_TYPES:
+            continue
+        code, size = _TIFF_TYPES[field_type]
+        value_offset = ifd + 2 + i * 12 + 8
+        if size * value_count > 4:
+            value_offset = struct.unpack(order + "I", source.Read(value_offset, 4))[0]
+        tags[tag] = struct.unpack(order + code * value_count, source.Read(value_offset, size * value_count))
+    if 256 not in tags or 257 not in tags:
+        return None
+    channels = tags.get(277, (1,))[0]
+    bit_depth = max(tags.get(258, (1,)))
+    is_float = 3 in tags.get(339, ())
+    return ImageInfo("tif", tags[256][0], tags[257][0], channels, bit_depth, is_float)
+
+def _ProbeBMP(source):
+    header_size = struct.unpack("<I", source.Read(14, 4))[0]
+    if header_size == 12:
+        width, height, planes, bit_count = struct.unpack("<HHHH", source.Read(18, 8))
+    else:
+        width, height, planes, bit_count = struct.unpack("<iiHH", source.Read(18, 12))
+    channels = 4 if bit_count == 32 else 3
+    return ImageInfo("bmp", abs(width), abs(height), channels, 8, False)
+
+# DXGI format -> (channels, bit depth, float), for the formats texture tools write
+_DXGI_FORMATS = {
+    2: (4, 32, True), 10: (4, 16, True), 11: (4, 16, False), 16: (2, 32, True), 34: (2, 16, True),
+    28: (4, 8, False), 29: (4, 8, False), 87: (4, 8, False), 91: (4, 8, False),
+    41: (1, 32, True), 54: (1, 16, True), 56: (1, 16, False), 61: (1, 8, False), 49: (2, 8, False),
+    71: (4, 8, False), 72: (4, 8, False), 74: (4, 8, False), 75: (4, 8, False), 77: (4, 8, False), 78: (4, 8, False),
+    80: (1, 8, False), 81: (1, 8, False), 83: (2, 8, False), 84: (2, 8, False),
+    95: (3, 16, True), 96: (3, 16, True), 98: (4, 8, False), 99: (4, 8, False),
+}
+# Legacy FourCC codes -> (channels, bit depth, float)
+_FOURCC_FORMATS = {
+    b"DXT1": (3, 8, False), b"DXT2": (4, 8, False), b"DXT3": (4, 8, False), b"DXT4": (4, 8, False), b"DXT5": (4, 8, False),
+    b"ATI1": (1, 8, False), b"BC4U": (1, 8, False), b"BC4S": (1, 8, False),
+    b"ATI2": (2, 8, False), b"BC5U": (2, 8, False), b"BC5S": (2, 8, False),
+    struct.pack("<I", 36): (4, 16, False), struct.pack("<I", 111): (1, 16, True), struct.pack("<I", 112): (2, 16, True),
+    struct.pack("<I", 113): (4, 16, True), struct.pack("<I", 114): (1, 32, True), struct.pack("<I", 115): (2, 32, True),
+    struct.pack("<I", 116): (4, 32, True),
+}
+
+def _ProbeDDS(source):
+    height, width = struct.unpack("<II", source.Read(12, 8))
+    pf_flags, fourcc, rgb_bit_count = struct.unpack("<I4sI", source.Read(80, 12))
+    if pf_flags & 0x4:  # DDPF_FOURCC
+        if fourcc == b"DX10":
+            layout = _DXGI_FORMATS.get(struct.unpack("<I", source.Read(128, 4))[0])
+        else:
+            layout = _FOURCC_FORMATS.get(fourcc)
+        if layout is None:
+            return ImageInfo("dds", width, height, None, None, False)
+        return ImageInfo("dds", width, height, *layout)
+    if pf_flags & 0x20000:  # DDPF_LUMINANCE
+        channels = 2 if pf_flags & 0x1 else 1
+        return ImageInfo("dds", width, height, channels, rgb_bit_count // channels, False)
+    channels = 4 if pf_flags & 0x1 else 3
+    return ImageInfo("dds", width, height, channels, 8, False)
+
+def _ProbeEXR(source):
+    offset = 8
+    channels = None
+    window = None
+    while channels is None or window is None:
+        name_end = source.Find(b"\0", offset)
+        if name_end < 0:  # truncated, e.g. still being written
+            return None
+        if name_end == offset:  # end of header
+            break
+        name = source.data[offset:name_end]
+        type_end = source.Find(b"\0", name_end + 1)
+        if type_end < 0:
+            return None
+        size_bytes = source.Read(type_end + 1, 4)
+        if len(size_bytes) < 4:
+            return None
+        size = struct.unpack("<i", size_bytes)[0]
+        if size < 0:
+            return None
+        value = source.Read(type_end + 5, size)
+        if len(value) < size:
+            return None
+        if name == b"channels":
+            channels = []
+            position = 0
+            while position < len(value) and value[position] != 0:
+                channel_end = value.index(b"\0", position)
+                channels.append(struct.unpack("<i", value[channel_end + 1:channel_end + 5])[0])
+                position = channel_end + 17  # pixel type, pLinear, reserved, x / y sampling
+        elif name == b"dataWindow":
+            window = struct.unpack("<iiii", value[:16])
+        offset = type_end + 5 + size
+    if not channels or window is None:
+        return None
+    bit_depth = 32 if 2 in channels or 0 in channels else 16
+    is_float = any(pixel_type != 0 for pixel_type in channels)
+    return ImageInfo("exr", window[2] - window[0] + 1, window[3] - window[1] + 1, len(channels), bit_depth, is_float)
+
+def _Probe(file):
+    source = _Source(file)
+    magic = source.data[:8]
+    if magic.startswith(b"\x89PNG\r\n\x1a\n"):
+        return _ProbePNG(source)
+    if magic.startswith(b"\xff\xd8"):
+        return _ProbeJPEG(source)
+    if magic[:4] in (b"II*\0", b"MM\0*"):
+        return _ProbeTIFF(source)
+    if magic.startswith(b"BM"):
+        return _ProbeBMP(source)
+    if magic.startswith(b"DDS "):
+        return _ProbeDDS(source)
+    if magic.startswith(b"\x76\x2f\x31\x01"):
+        return _ProbeEXR(source)
+    return _ProbeTGA(source)  # TGA has no magic bytes, checked last
+
+def IsGrayscale(info):
+    """
+    True for single channel images, False if unknown.
+    Two channel images are left out, BC5 / RG normal maps are stored that way.
+    """
+    return info is not None and info.channels == 1
+
+def ProbeImage(filepath):
+    """
+    Returns the ImageInfo of an image file, or None if it can't be read or recognised.
+    """
+    try:
+        with open(filepath, "rb") as file:
+            return _Probe(file)
+    except (OSError, struct.error, ValueError, IndexError):
+        return None
+
+#=============================================
+#               Cache
+#=============================================
+
+class ProbeCache:
+    """
+    ImageInfo per file, valid as long as the file's mtime and size are unchanged.
+    """
+
+    def __init__(self, workers=PROBE_WORKERS):
+        self.workers = workers
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _Get(self, filepath):
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            entry = self.entries.get(filepath)
+            if entry is not None and entry[0] == stamp:
+                self.hits += 1
+                return entry[1]
+        info = ProbeImage(filepath)
+        with self.lock:
+            self.entries[filepath] = (stamp, info)
+            self.misses += 1
+        return info
+
+    def Probe(self, filepaths):
+        """
+        Probes many files on the thread pool.
+
+        Returns
+        -------
+        dict
+            filepath -> ImageInfo, or None for files that could not be probed.
+        """
+        filepaths = list(dict.fromkeys(filepaths))
+        if len(filepaths) <= 1 or self.workers <= 1:
+            return {filepath: self._Get(filepath) for filepath in filepaths}
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(filepaths))) as executor:
+            return dict(zip(filepaths, executor.map(self._Get, filepaths)))
+
+    def Report(self):
+        return "%d images probed, %d from cache" % (self.hits + self.misses, self.hits)
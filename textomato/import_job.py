@@ -0,0 +1,262 @@
+#  Non-blocking imports
+#
+#  An import is split into a preparation that only reads the disk (scanning,
+#  probing, converting) and runs on a worker thread, and a build that changes
+#  the document and has to run on the main thread. The build is a generator
+#  that yields after every material; the dialog calls Step from a timer, so
+#  each call builds materials for one time slice and then hands control back
+#  to Cinema 4D. Cancelling stops the build between two materials and closes
+#  the generator, which runs its cleanup (commit, EndUndo) right away.
+#
+#  Nothing a build opens may stay open while Cinema 4D has control: the user
+#  can undo, edit or switch documents between two slices. A build sets
+#  job.slices to close its graph transactions and undo step at the end of a
+#  slice, reopen them at the start of the next one and tell when the document
+#  changed under it, which cancels the job.
+#
+#  Pure Python, no c4d / maxon imports.
+#
+import threading
+import time
+import traceback
+
+SLICE_SECONDS = 0.1     # build time per Step before the UI gets control back
+
+PENDING = "pending"
+PREPARING = "preparing"
+BUILDING = "building"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+def FormatDuration(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return "%ds" % seconds
+    if seconds < 3600:
+        return "%dm %02ds" % divmod(seconds, 60)
+    return "%dh %02dm" % divmod(seconds // 60, 60)
+
+class ImportProgress:
+    """
+    Done / total counts of the running phase of an import, safe to update from the worker thread.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phase = ""
+        self.done = 0
+        self.total = 0
+        self.start = time.perf_counter()
+
+    def Begin(self, phase, total=0):
+        with self.lock:
+            self.phase = phase
+            self.done = 0
+            self.total = total
+            self.start = time.perf_counter()
+
+    def Advance(self, done=None):
+        """
+        Counts one more item, or sets the count if done is given.
+        """
+        with self.lock:
+            self.done = self.done + 1 if done is None else done
+
+    def Fraction(self):
+        with self.lock:
+            return min(1.0, self.done / self.total) if self.total else 0.0
+
+    def ETA(self):
+        """
+        Seconds left in the running phase at the rate so far, None before the first item is done.
+        """
+        with self.lock:
+            if not self.done or not self.total:
+                return None
+            return (time.perf_counter() - self.start) / self.done * max(0, self.total - self.done)
+
+    def Text(self):
+        eta = self.ETA()
+        with self.lock:
+            if not self.total:
+                return self.phase
+            text = "%s %d/%d" % (self.phase, self.done, self.total)
+        if eta is not None:
+            text += ", about %s left" % FormatDuration(eta)
+        return text
+
+class ImportJob:
+    """
+    One import run, prepared on a worker thread and built in time slices on the calling thread.
+
+    Parameters
+    ----------
+    prepare : callable
+        prepare(job) -> prepared, runs on the worker thread and must not touch
+        the document. Returns None to stop the job, e.g. when job.IsCancelled().
+    build : callable
+        build(job, prepared) -> generator, runs on the thread calling Step and
+        yields once per material. Its try / finally blocks run on cancel too.
+    finish : callable
+        finish(job), called once on the Step thread when the job ends, however it ends.
+
+    The build may set `slices` to an object with Pause(), Resume() and Interrupted():
+    Step calls Pause when a slice ends with materials left, Resume before the next
+    slice builds, and cancels the job instead if Interrupted() returns True.
+    """
+
+    def __init__(self, prepare, build, finish=None):
+        self.prepare = prepare
+        self.build = build
+        self.finish = finish
+        self.progress = ImportProgress()
+        self.state = PENDING
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.thread = None
+        self.prepared = None
+        self.steps = None
+        self.slices = None
+        self.paused = False
+        self.start = None
+        self.elapsed = 0.0
+        self.built = 0
+
+    def IsCancelled(self):
+        return self.cancel_event.is_set()
+
+    def IsRunning(self):
+        return self.state in (PREPARING, BUILDING)
+
+    def Cancel(self):
+        """
+        Asks the job to stop. The preparation stops at its next check, the build before its next material.
+        """
+        self.cancel_event.set()
+
+    def Interrupted(self):
+        """
+        True if the build is paused between two slices and can't go on, see `slices`.
+        """
+        return self.paused and self.slices is not None and self.slices.Interrupted()
+
+    def Abort(self):
+        """
+        Cancels the job and ends it in the calling thread, for when nothing is going to call Step anymore.
+        """
+        self.Cancel()
+        if self.thread is not None:
+            self.thread.join()
+        while self.Step():
+            pass
+
+    def _Prepare(self):
+        try:
+            self.prepared = self.prepare(self)
+        except Exception:
+            self.error = traceback.format_exc()
+
+    def Start(self):
+        """
+        Starts the preparation on a worker thread; Step has to be called until it returns False.
+        """
+        self.start = time.perf_counter()
+        self.state = PREPARING
+        self.progress.Begin("Preparing")
+        self.thread = threading.Thread(target=self._Prepare, name="TexToMatO import", daemon=True)
+        self.thread.start()
+
+    def _End(self, state):
+        if self.steps is not None:
+            self.steps.close()
+            self.steps = None
+        self.state = state
+        self.elapsed = time.perf_counter() - self.start
+        if self.finish is not None:
+            self.finish(self)
+        return False
+
+    def Step(self, budget=SLICE_SECONDS):
+        """
+        Advances the job by at most about `budget` seconds of building.
+
+        Returns
+        -------
+        bool
+            True while the job has work left.
+        """
+        if self.state == PREPARING:
+            if self.thread.is_alive():
+                return True
+            if self.error is not None:
+                return self._End(FAILED)
+            if self.prepared is None or self.IsCancelled():
+                return self._End(CANCELLED)
+            self.state = BUILDING
+            try:
+                self.steps = self.build(self, self.prepared)
+            except Exception:
+                self.error = traceback.format_exc()
+                return self._End(FAILED)
+        if self.state != BUILDING:
+            return False
+
+        deadline = time.perf_counter() + budget
+        try:
+            if self.paused:
+                if not self.IsCancelled():
+                    if self.Interrupted():
+                        self.Cancel()
+                    else:
+                        self.slices.Resume()
+                self.paused = False
+            while True:
+                if self.IsCancelled():
+                    return self._End(CANCELLED)
+                next(self.steps)
+                self.built += 1
+                self.progress.Advance()
+                if time.perf_counter() >= deadline:
+                    if self.slices is not None:
+                        self.slices.Pause()
+                        self.paused = True
+                    return True
+        except StopIteration:
+            self.steps = None
+            return self._End(DONE)
+        except Exception:
+            self.error = traceback.format_exc()
+            return self._End(FAILED)
+
+    def Run(self):
+        """
+        Prepares and builds in the calling thread without time slicing, exceptions propagate.
+        """
+        self.start = time.perf_counter()
+        self.state = PREPARING
+        state = FAILED
+        try:
+            self.progress.Begin("Preparing")
+            self.prepared = self.prepare(self)
+            if self.prepared is not None:
+                self.state = BUILDING
+                for _ in self.build(self, self.prepared):
+                    self.built += 1
+                    self.progress.Advance()
+                state = DONE
+            else:
+                state = CANCELLED
+        finally:
+            self.state = state
+            self.elapsed = time.perf_counter() - self.start
+            if self.finish is not None:
+                self.finish(self)
+        return self.state
+
+    def Report(self):
+        if self.state == FAILED:
+            return "failed after %s" % FormatDuration(self.elapsed)
+        if self.state == CANCELLED:
+            return "cancelled after %s, %d materials built" % (FormatDuration(self.elapsed), self.built)
+        return "%d materials in %s" % (self.built, FormatDuration(self.elapsed))
@@ -0,0 +1,239 @@
+#  Headless texture library scanner
+#
+#  Walks texture library roots with a process pool, classifies every image
+#  with the same channel classifier the plugin uses and writes the material
+#  sets to a JSON manifest. Import-from-folder picks up a manifest lying in
+#  the selected folder and skips scanning altogether.
+#
+#      python -m textomato.scanner ROOT [ROOT ...] [-o MANIFEST] [-j JOBS]
+#                                  [--custom-regex FILE] [--case-insensitive]
+#
+#  Paths in the manifest are relative to the manifest's folder with "/"
+#  separators, so a manifest written on a Linux box is valid on a workstation
+#  that mounts the library somewhere else.
+#
+#  The manifest also records the modification time of every scanned folder.
+#  Adding, removing or renaming a file or subfolder bumps its folder's time,
+#  so a manifest older than any of its folders is ignored and the folder is
+#  scanned live instead.
+#
+#  Pure Python, no c4d / maxon imports.
+#
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from . import channels
+from .folder_index import ClassifyFolder, GroupFolder
+
+MANIFEST_VERSION = 2
+MANIFEST_NAME = "textomato_manifest.json"
+
+#=============================================
+#               Scanning
+#=============================================
+
+_worker_classifier = None
+
+def _InitWorker(custom_regex_dict, case_insensitive):
+    # Classifiers are compiled per process, they are not picklable
+    global _worker_classifier
+    _worker_classifier = channels.GetClassifier(custom_regex_dict, case_insensitive)
+
+def _ScanWorker(folder):
+    """
+    Lists one folder: returns (folder, mtime, groups, subfolders, error).
+    Files and subfolders come from the same directory read, the time is taken
+    before it so changes made while scanning make the manifest stale.
+    """
+    subfolders = []
+    mtime = None
+    try:
+        mtime = os.stat(folder).st_mtime
+        with os.scandir(folder) as it:
+            for dir_entry in it:
+                if dir_entry.is_dir(follow_symlinks=False):
+                    subfolders.append(dir_entry.path)
+        groups = GroupFolder(folder, ClassifyFolder(folder, _worker_classifier))
+    except OSError as e:
+        return folder, mtime, {}, [], str(e)
+    return folder, mtime, groups, sorted(subfolders), None
+
+def ScanLibrary(roots, custom_regex_dict=None, case_insensitive=False, jobs=None, recursive=True):
+    """
+    Scans library roots and returns their material sets.
+
+    Parameters
+    ----------
+    roots : list
+        Folders to scan.
+    custom_regex_dict : dict
+        Additional channel tokens, as in user/custom_regex.json.
+    case_insensitive : bool
+        Match channel tokens case insensitively.
+    jobs : int
+        Worker processes, os.cpu_count() if None. 1 scans in this process.
+    recursive : bool
+        Also scan all subfolders.
+
+    Returns
+    -------
+    (material_sets, errors, folders)
+        material_sets is a list of (folder, prefix, [(channel, filepath), ...]) sorted by folder and prefix,
+        errors a list of (folder, message), folders a dict of every scanned folder to its modification time.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    material_sets = []
+    errors = []
+    folders = {}
+    level = [os.path.abspath(root) for root in roots]
+
+    pool = None
+    if jobs > 1:
+        pool = multiprocessing.Pool(jobs, initializer=_InitWorker, initargs=(custom_regex_dict, case_insensitive))
+        scan = lambda folders: pool.imap_unordered(_ScanWorker, folders, chunksize=4)
+    else:
+        _InitWorker(custom_regex_dict, case_insensitive)
+        scan = lambda folders: map(_ScanWorker, folders)
+    try:
+        # Breadth first, every level of the tree is spread over the pool
+        while level:
+            next_level = []
+            for folder, mtime, groups, subfolders, error in scan(level):
+                folders[folder] = mtime
+                if error is not None:
+                    errors.append((folder, error))
+                    continue
+                for prefix, tex_tuples in groups.items():
+                    material_sets.append((folder, prefix, tex_tuples))
+                if recursive:
+                    next_level += subfolders
+            level = next_level
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    material_sets.sort(key=lambda material_set: (material_set[0], material_set[1]))
+    return material_sets, errors, folders
+
+#=============================================
+#               Manifest
+#=============================================
+
+def _RelativePath(path, base):
+    try:
+        return os.path.relpath(path, base).replace(os.sep, "/")
+    except ValueError:  # different drive on Windows
+        return os.path.abspath(path).replace(os.sep, "/")
+
+def WriteManifest(manifest_file, material_sets, classifier, folders):
+    """
+    Writes material sets and folder times from ScanLibrary to a manifest file.
+    Folders that could not be read are left out, so the manifest is stale until they can.
+    """
+    base = os.path.dirname(os.path.abspath(manifest_file))
+    materials = []
+    for folder, prefix, tex_tuples in material_sets:
+        materials.append({
+            "folder": _RelativePath(folder, base),
+            "prefix": prefix,
+            "textures": [[channel, os.path.basename(filepath)] for channel, filepath in tex_tuples],
+        })
+    data = {
+        "version": MANIFEST_VERSION,
+        "config": classifier.config_hash,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "folders": {_RelativePath(folder, base): mtime for folder, mtime in folders.items() if mtime is not None},
+        "materials": materials,
+    }
+    temp_file = manifest_file + ".tmp"
+    with open(temp_file, "w") as write_file:
+        json.dump(data, write_file, separators=(",", ":"))
+    os.replace(temp_file, manifest_file)
+    # Writing the manifest bumps its own folder, the file's time marks the folder as written after that
+    os.utime(manifest_file)
+
+def _StaleFolder(folders, base, manifest_mtime):
+    # First folder that changed or disappeared since the scan, None if all are as scanned
+    for folder, mtime in folders.items():
+        path = os.path.normpath(os.path.join(base, folder))
+        if path == base:
+            mtime = max(mtime, manifest_mtime)
+        try:
+            if os.stat(path).st_mtime > mtime:
+                return path
+        except OSError:
+            return path
+    return None
+
+def ReadManifest(manifest_file, classifier):
+    """
+    Reads a manifest written for the same channel config whose folders haven't changed since.
+
+    Returns
+    -------
+    list of (prefix, [(channel, filepath), ...]) with absolute filepaths,
+    or None if there is no valid manifest, it was written with another channel config
+    or a scanned folder is newer than the manifest.
+    """
+    try:
+        manifest_mtime = os.stat(manifest_file).st_mtime
+        with open(manifest_file, "r") as read_file:
+            data = json.load(read_file)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != MANIFEST_VERSION:
+        return None
+    if data.get("config") != classifier.config_hash:
+        print("[WARNING] " + manifest_file + " was written with other channel settings, scanning instead.")
+        return None
+    base = os.path.dirname(os.path.abspath(manifest_file))
+    stale_folder = _StaleFolder(data.get("folders", {}), base, manifest_mtime)
+    if stale_folder is not None:
+        print("[WARNING] " + stale_folder + " changed since " + manifest_file + " was written, scanning instead.")
+        return None
+    material_sets = []
+    for material in data.get("materials", []):
+        folder = os.path.normpath(os.path.join(base, material["folder"]))
+        material_sets.append((material["prefix"], [(channel, os.path.join(folder, filename)) for channel, filename in material["textures"]]))
+    return material_sets
+
+#=============================================
+#               Command line
+#=============================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m textomato.scanner", description="Scan texture libraries into a TexToMatO import manifest.")
+    parser.add_argument("roots", nargs="+", help="library folders to scan")
+    parser.add_argument("-o", "--output", help="manifest file, defaults to ROOT/" + MANIFEST_NAME + " for a single root")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--custom-regex", help="custom_regex.json with additional channel tokens")
+    parser.add_argument("--case-insensitive", action="store_true", help="match channel tokens case insensitively")
+    parser.add_argument("--no-recursive", action="store_true", help="do not scan subfolders")
+    args = parser.parse_args(argv)
+
+    output = args.output
+    if output is None:
+        if len(args.roots) != 1:
+            parser.error("--output is required when scanning several roots")
+        output = os.path.join(args.roots[0], MANIFEST_NAME)
+
+    custom_regex_dict = None
+    if args.custom_regex:
+        with open(args.custom_regex, "r") as read_file:
+            custom_regex_dict = json.load(read_file)
+    classifier = channels.GetClassifier(custom_regex_dict, args.case_insensitive)
+
+    start = time.perf_counter()
+    material_sets, errors, folders = ScanLibrary(args.roots, custom_regex_dict, args.case_insensitive, args.jobs, not args.no_recursive)
+    WriteManifest(output, material_sets, classifier, folders)
+    for folder, error in errors:
+        print("[WARNING] Could not scan " + folder + ": " + error, file=sys.stderr)
+    print("%d material sets from %d folders in %.2fs -> %s" % (len(material_sets), len(folders), time.perf_counter() - start, output))
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
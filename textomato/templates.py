@@ -0,0 +1,86 @@
+#  Material recipe templates
+#
+#  Texture sets in a library mostly share the same channel combination, so
+#  the first material of a combination is built node by node and the rest
+#  are stamped out as copies with only their texture paths rewritten.
+#  This module holds the pure parts: the template key and the cache stats.
+#
+import time
+
+from .image_probe import IsGrayscale
+
+# material_arguments that change the graph a texture set produces
+TEMPLATE_ARGUMENTS = ("addCC", "addTriplanar", "addScaleRotOff", "aoOverallTint", "bumpFlipY", "bumpLegacy", "spriteOpacity")
+
+def TemplateKey(tex_tuples, classifier, material_arguments, image_infos=None):
+    """
+    Returns (key, ordered_tex_tuples) for a texture set.
+
+    The textures are put in a canonical order so that slot i of a template
+    always corresponds to texture i of every set with the same key. Channel
+    names only count when triplanar nodes are named after them, and image
+    facts only whether a texture is single channel, the one thing
+    PlanMaterial decides on.
+    """
+    image_infos = image_infos or {}
+    named = material_arguments["addTriplanar"]
+    known = []
+    unknown = []
+    for channel_name, filepath in tex_tuples:
+        channel_type = classifier.ChannelType(channel_name)
+        if channel_type is None:
+            unknown.append((channel_name, filepath))
+        else:
+            known.append(((channel_type, channel_name if named else "", IsGrayscale(image_infos.get(filepath))), (channel_name, filepath)))
+    known.sort(key=lambda item: (item[0], item[1][1]))
+    key = (
+        tuple(item[0] for item in known),
+        tuple(material_arguments[argument] for argument in TEMPLATE_ARGUMENTS),
+        tuple(sorted(material_arguments["multiTex"].items())),
+    )
+    return key, [item[1] for item in known] + unknown
+
+class TemplateCache:
+    """
+    Templates of one import run with hit rate and build / stamp timing.
+    """
+
+    def __init__(self):
+        self.templates = {}
+        self.hits = 0
+        self.misses = 0
+        self.build_time = 0.0
+        self.stamp_time = 0.0
+
+    def Get(self, key):
+        template = self.templates.get(key)
+        if template is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return template
+
+    def Put(self, key, template):
+        self.templates[key] = template
+
+    def Timer(self):
+        return time.perf_counter()
+
+    def Record(self, start, stamped):
+        """
+        Adds the time since `start` (from Timer) to the build or stamp total.
+        """
+        elapsed = time.perf_counter() - start
+        if stamped:
+            self.stamp_time += elapsed
+        else:
+            self.build_time += elapsed
+
+    def Report(self):
+        total = self.hits + self.misses
+        if not total:
+            return "no materials"
+        build = self.build_time / self.misses * 1000.0 if self.misses else 0.0
+        stamp = self.stamp_time / self.hits * 1000.0 if self.hits else 0.0
+        return "%d templates, %d/%d hits (%.0f%%), %.1f ms per built material, %.1f ms per stamped material" % (
+            len(self.templates), self.hits, total, 100.0 * self.hits / total, build, stamp)